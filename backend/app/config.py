@@ -12,6 +12,12 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "preet")
 DB_DRIVER = os.getenv("DB_DRIVER", "ODBC Driver 17 for SQL Server")
 DB_TRUSTED_CONNECTION = os.getenv("DB_TRUSTED_CONNECTION", "no")
 
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # Seconds before a connection is replaced
+
 # API configuration
 API_SECRET_KEY = os.getenv("API_SECRET_KEY", "your-secret-key")
 API_ALGORITHM = os.getenv("API_ALGORITHM", "HS256")
@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import column, create_engine, select, table, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import DB_SERVER, DB_NAME, DB_USER, DB_PASSWORD, DB_DRIVER, DB_TRUSTED_CONNECTION
+from app.config import (
+    DB_SERVER, DB_NAME, DB_USER, DB_PASSWORD, DB_DRIVER, DB_TRUSTED_CONNECTION,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+)
 import urllib.parse
 import logging
 from fastapi import HTTPException
@@ -27,12 +30,17 @@ try:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL, 
         echo=False,  # Set to False to reduce output
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,  # Replace connections before the server or a firewall drops them
         pool_pre_ping=True,
         connect_args={"connect_timeout": 5}  # Add timeout
     )
     
-    # Create a SessionLocal class
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # Create a SessionLocal class. Objects stay loaded after commit so returning
+    # them from a route doesn't trigger a reload per attribute.
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
     
     # Print success message
     logger.warning(f"Database connection established successfully to {DB_SERVER}")
@@ -42,7 +50,7 @@ except Exception as e:
     # Create a dummy engine and session for testing
     from sqlalchemy import create_engine
     engine = create_engine("sqlite:///:memory:")
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
     logger.warning("Using in-memory SQLite database as fallback")
 
 # Dependency to get the database session
@@ -71,14 +79,20 @@ def recreate_all_tables():
         return
         
     try:
-        logger.warning("Dropping all tables...")
-        Base.metadata.drop_all(bind=engine)
-        logger.warning("Creating all tables...")
-        Base.metadata.create_all(bind=engine)
+        # Run the drop and create in one transaction. Every table is gone after
+        # drop_all, so create_all can skip its per-table existence checks.
+        with engine.begin() as conn:
+            logger.warning("Dropping all tables...")
+            Base.metadata.drop_all(bind=conn)
+            logger.warning("Creating all tables...")
+            Base.metadata.create_all(bind=conn, checkfirst=False)
         logger.warning("Tables recreated successfully!")
     except Exception as e:
         logger.error(f"Error recreating tables: {e}")
 
+# Number of tests remapped per round trip during the schema migration
+MIGRATION_BATCH_SIZE = 1000
+
 # Function to migrate from old schema to new schema
 def migrate_to_test_id_primary_key():
     """
@@ -97,40 +111,55 @@ def migrate_to_test_id_primary_key():
         trans = conn.begin()
         
         try:
-            # Step 1: Get all tests and their associated data
-            result = conn.execute("SELECT id, test_id, skill, num_questions, duration, created_by, created_at FROM tests")
-            tests = [dict(row) for row in result]
-            logger.info(f"Found {len(tests)} tests to migrate")
+            # Step 1 & 2: Walk the tests in id order, one batch at a time, and update
+            # foreign keys in other tables to reference test_id instead of id
+            tests_table = table("tests", column("id"), column("test_id"))
+            update_questions = text("UPDATE questions SET test_id = :new_id WHERE test_id = :old_id")
+            update_sessions = text("UPDATE test_sessions SET test_id = :new_id WHERE test_id = :old_id")
+            
+            migrated = 0
+            last_id = None
+            while True:
+                batch_query = (
+                    select(tests_table.c.id, tests_table.c.test_id)
+                    .order_by(tests_table.c.id)
+                    .limit(MIGRATION_BATCH_SIZE)
+                )
+                if last_id is not None:
+                    batch_query = batch_query.where(tests_table.c.id > last_id)
+                
+                batch = conn.execute(batch_query).all()
+                if not batch:
+                    break
+                
+                id_params = [{"new_id": row.test_id, "old_id": row.id} for row in batch]
+                
+                # Update foreign keys in questions table
+                conn.execute(update_questions, id_params)
+                
+                # Update foreign keys in test_sessions table
+                conn.execute(update_sessions, id_params)
+                
+                migrated += len(batch)
+                last_id = batch[-1].id
             
-            # Step 2: Update foreign keys in other tables to reference test_id instead of id
-            if len(tests) > 0:
-                for test in tests:
-                    old_id = test['id']
-                    new_id = test['test_id']
-                    
-                    # Update foreign keys in questions table
-                    conn.execute(f"UPDATE questions SET test_id = {new_id} WHERE test_id = {old_id}")
-                    
-                    # Update foreign keys in test_sessions table
-                    conn.execute(f"UPDATE test_sessions SET test_id = {new_id} WHERE test_id = {old_id}")
-                    
-                    logger.info(f"Migrated references for test id={old_id} to test_id={new_id}")
+            logger.info(f"Migrated references for {migrated} tests to test_id")
             
             # Step 3: Recreate the tests table with test_id as primary key
             logger.warning("Recreating tests table with test_id as primary key...")
             
             # Create a backup of the tests table
-            conn.execute("SELECT * INTO tests_backup FROM tests")
+            conn.execute(text("SELECT * INTO tests_backup FROM tests"))
             
             # Drop constraints referencing the tests table
-            conn.execute("ALTER TABLE questions DROP CONSTRAINT IF EXISTS FK__questions__test___4CA06362")
-            conn.execute("ALTER TABLE test_sessions DROP CONSTRAINT IF EXISTS FK__test_sess__test___5DCAEF64")
+            conn.execute(text("ALTER TABLE questions DROP CONSTRAINT IF EXISTS FK__questions__test___4CA06362"))
+            conn.execute(text("ALTER TABLE test_sessions DROP CONSTRAINT IF EXISTS FK__test_sess__test___5DCAEF64"))
             
             # Drop the old tests table
-            conn.execute("DROP TABLE tests")
+            conn.execute(text("DROP TABLE tests"))
             
             # Create the new tests table with test_id as primary key
-            conn.execute("""
+            conn.execute(text("""
                 CREATE TABLE tests (
                     test_id INT PRIMARY KEY,
                     skill NVARCHAR(100) NOT NULL,
@@ -139,30 +168,30 @@ def migrate_to_test_id_primary_key():
                     created_by INT NOT NULL,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
-            """)
+            """))
             
             # Restore data from backup
-            conn.execute("""
+            conn.execute(text("""
                 INSERT INTO tests (test_id, skill, num_questions, duration, created_by, created_at)
                 SELECT test_id, skill, num_questions, duration, created_by, created_at 
                 FROM tests_backup
-            """)
+            """))
             
             # Recreate foreign key constraints to reference test_id
-            conn.execute("""
+            conn.execute(text("""
                 ALTER TABLE questions 
                 ADD CONSTRAINT FK__questions__test_id 
                 FOREIGN KEY (test_id) REFERENCES tests(test_id)
-            """)
+            """))
             
-            conn.execute("""
+            conn.execute(text("""
                 ALTER TABLE test_sessions 
                 ADD CONSTRAINT FK__test_sessions__test_id 
                 FOREIGN KEY (test_id) REFERENCES tests(test_id)
-            """)
+            """))
             
             # Drop the backup table
-            conn.execute("DROP TABLE tests_backup")
+            conn.execute(text("DROP TABLE tests_backup"))
             
             # Commit the transaction
             trans.commit()
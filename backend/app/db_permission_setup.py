@@ -54,30 +54,29 @@ def check_table_permissions():
         connection = engine.raw_connection()
         cursor = connection.cursor()
         
-        # Get all tables in the database
-        inspector = inspect(engine)
-        tables = inspector.get_table_names(schema='dbo')
-        
-        logger.info(f"Checking permissions for tables: {tables}")
+        # Check permissions for every table in a single parameterized query
+        sql = """
+        SELECT 
+            TABLE_NAME,
+            HAS_PERMS_BY_NAME(QUOTENAME(TABLE_SCHEMA) + '.' + QUOTENAME(TABLE_NAME), 'OBJECT', 'SELECT') as has_select,
+            HAS_PERMS_BY_NAME(QUOTENAME(TABLE_SCHEMA) + '.' + QUOTENAME(TABLE_NAME), 'OBJECT', 'INSERT') as has_insert,
+            HAS_PERMS_BY_NAME(QUOTENAME(TABLE_SCHEMA) + '.' + QUOTENAME(TABLE_NAME), 'OBJECT', 'UPDATE') as has_update,
+            HAS_PERMS_BY_NAME(QUOTENAME(TABLE_SCHEMA) + '.' + QUOTENAME(TABLE_NAME), 'OBJECT', 'DELETE') as has_delete
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = ? AND TABLE_TYPE = 'BASE TABLE'
+        """
+        cursor.execute(sql, 'dbo')
         
-        # For each table, check permissions
         result = {}
-        for table in tables:
-            sql = f"""
-            SELECT 
-                HAS_PERMS_BY_NAME('dbo.{table}', 'OBJECT', 'SELECT') as has_select,
-                HAS_PERMS_BY_NAME('dbo.{table}', 'OBJECT', 'INSERT') as has_insert,
-                HAS_PERMS_BY_NAME('dbo.{table}', 'OBJECT', 'UPDATE') as has_update,
-                HAS_PERMS_BY_NAME('dbo.{table}', 'OBJECT', 'DELETE') as has_delete
-            """
-            cursor.execute(sql)
-            row = cursor.fetchone()
-            result[table] = {
-                'SELECT': bool(row[0]),
-                'INSERT': bool(row[1]),
-                'UPDATE': bool(row[2]),
-                'DELETE': bool(row[3])
+        for row in cursor.fetchall():
+            result[row[0]] = {
+                'SELECT': bool(row[1]),
+                'INSERT': bool(row[2]),
+                'UPDATE': bool(row[3]),
+                'DELETE': bool(row[4])
             }
+        
+        logger.info(f"Checked permissions for tables: {list(result)}")
             
         # Close cursor and connection
         cursor.close()
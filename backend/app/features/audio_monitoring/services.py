@@ -9,7 +9,9 @@ from sqlalchemy import and_
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
+from collections import Counter
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -84,24 +86,7 @@ class AudioMonitoringService:
     def get_session_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
         """Get all audio violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'audio_suspicious'
-                )
-            ).order_by(Violation.timestamp.desc()).all()
-            
-            return [
-                {
-                    "id": violation.id,
-                    "session_id": violation.session_id,
-                    "timestamp": violation.timestamp,
-                    "details": violation.details,
-                    "filepath": violation.filepath
-                } for violation in violations
-            ]
+            return ViolationService.list_session_violations(db, session_id, 'audio_suspicious')
         except Exception as e:
             logger.error(f"Error getting session audio violations: {str(e)}")
             return []
@@ -110,8 +95,6 @@ class AudioMonitoringService:
     def get_audio_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current audio monitoring status for a session"""
         try:
-            from app.models.violation import Violation
-            
             # Get the most recent violation
             latest_violation = db.query(Violation).filter(
                 and_(
@@ -184,8 +167,6 @@ class AudioMonitoringService:
     def get_violation_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of audio violations for a session"""
         try:
-            from app.models.violation import Violation
-            
             violations = db.query(Violation).filter(
                 and_(
                     Violation.session_id == session_id,
@@ -206,7 +187,7 @@ class AudioMonitoringService:
             total_violations = len(violations)
             durations = []
             audio_levels = []
-            audio_types = {}
+            audio_types = Counter()
             
             for violation in violations:
                 if violation.details and 'audio_analysis' in violation.details:
@@ -221,7 +202,7 @@ class AudioMonitoringService:
                         audio_levels.append(audio_level)
                     
                     audio_type = audio_analysis.get('audio_type', 'unknown')
-                    audio_types[audio_type] = audio_types.get(audio_type, 0) + 1
+                    audio_types[audio_type] += 1
             
             total_duration = sum(durations)
             average_audio_level = sum(audio_levels) / len(audio_levels) if audio_levels else 0
@@ -232,7 +213,7 @@ class AudioMonitoringService:
                 "total_violations": total_violations,
                 "total_duration": round(total_duration, 2),
                 "average_audio_level": round(average_audio_level, 2),
-                "audio_types": audio_types,
+                "audio_types": dict(audio_types),
                 "last_violation": last_violation
             }
         except Exception as e:
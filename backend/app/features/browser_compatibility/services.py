@@ -11,6 +11,7 @@ from datetime import datetime
 import logging
 import re
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -26,23 +27,34 @@ class BrowserCompatibilityService:
         'safari': ['safari']
     }
     
+    # All supported browser patterns folded into one case-insensitive regex, so
+    # each string is scanned once instead of once per pattern
+    _SUPPORTED_BROWSER_RE = re.compile(
+        '|'.join(re.escape(pattern) for patterns in SUPPORTED_BROWSERS.values() for pattern in patterns),
+        re.IGNORECASE
+    )
+    
+    # (user agent marker, browser name, version pattern) in detection order
+    _BROWSER_VERSION_PATTERNS = (
+        ('chrome', 'Chrome', re.compile(r'Chrome/(\d+\.\d+)')),
+        ('firefox', 'Firefox', re.compile(r'Firefox/(\d+\.\d+)')),
+        ('edge', 'Edge', re.compile(r'Edge/(\d+\.\d+)')),
+        ('safari', 'Safari', re.compile(r'Safari/(\d+\.\d+)'))
+    )
+    
     @staticmethod
     def check_browser_compatibility(browser_name: str, user_agent: Optional[str] = None) -> bool:
         """Check if a browser is compatible"""
         try:
-            browser_name_lower = browser_name.lower()
+            supported_browser_re = BrowserCompatibilityService._SUPPORTED_BROWSER_RE
             
             # Check if browser is in supported list
-            for supported_browser, patterns in BrowserCompatibilityService.SUPPORTED_BROWSERS.items():
-                if any(pattern in browser_name_lower for pattern in patterns):
-                    return True
+            if supported_browser_re.search(browser_name):
+                return True
             
             # Additional check using user agent if provided
-            if user_agent:
-                user_agent_lower = user_agent.lower()
-                for supported_browser, patterns in BrowserCompatibilityService.SUPPORTED_BROWSERS.items():
-                    if any(pattern in user_agent_lower for pattern in patterns):
-                        return True
+            if user_agent and supported_browser_re.search(user_agent):
+                return True
             
             return False
             
@@ -54,37 +66,21 @@ class BrowserCompatibilityService:
     def extract_browser_info(user_agent: str) -> tuple[str, Optional[str]]:
         """Extract browser name and version from user agent string"""
         try:
-            # Common browser patterns
-            patterns = {
-                'chrome': r'Chrome/(\d+\.\d+)',
-                'firefox': r'Firefox/(\d+\.\d+)',
-                'edge': r'Edge/(\d+\.\d+)',
-                'safari': r'Safari/(\d+\.\d+)'
-            }
-            
             user_agent_lower = user_agent.lower()
             
             # Determine browser name
-            if 'chrome' in user_agent_lower:
-                browser_name = 'Chrome'
-                pattern = patterns['chrome']
-            elif 'firefox' in user_agent_lower:
-                browser_name = 'Firefox'
-                pattern = patterns['firefox']
-            elif 'edge' in user_agent_lower:
-                browser_name = 'Edge'
-                pattern = patterns['edge']
-            elif 'safari' in user_agent_lower:
-                browser_name = 'Safari'
-                pattern = patterns['safari']
-            else:
-                browser_name = 'Unknown'
-                pattern = None
+            browser_name = 'Unknown'
+            pattern = None
+            for marker, name, version_pattern in BrowserCompatibilityService._BROWSER_VERSION_PATTERNS:
+                if marker in user_agent_lower:
+                    browser_name = name
+                    pattern = version_pattern
+                    break
             
             # Extract version
             version = None
             if pattern:
-                match = re.search(pattern, user_agent)
+                match = pattern.search(user_agent)
                 if match:
                     version = match.group(1)
             
@@ -153,8 +149,6 @@ class BrowserCompatibilityService:
     def get_session_browser_checks(db: Session, session_id: int) -> List[Dict[str, Any]]:
         """Get all browser compatibility checks for a session"""
         try:
-            from app.models.violation import Violation
-            
             violations = db.query(Violation).filter(
                 and_(
                     Violation.session_id == session_id,
@@ -179,8 +173,6 @@ class BrowserCompatibilityService:
     def get_browser_compatibility_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current browser compatibility status for a session"""
         try:
-            from app.models.violation import Violation
-            
             # Get the most recent browser compatibility violation for this session
             latest_violation = db.query(Violation).filter(
                 and_(
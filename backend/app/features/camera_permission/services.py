@@ -10,6 +10,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -70,8 +71,6 @@ class CameraPermissionService:
         """Check if there's a camera permission violation for the session"""
         try:
             # Query the violations table for camera permission violations
-            from app.models.violation import Violation
-            
             violation = db.query(Violation).filter(
                 and_(
                     Violation.session_id == session_id,
@@ -16,6 +16,7 @@ import base64
 import os
 from io import BytesIO
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -164,8 +165,6 @@ class FaceDetectionService:
     def get_session_multiple_faces_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
         """Get all multiple faces violations for a session"""
         try:
-            from app.models.violation import Violation
-            
             violations = db.query(Violation).filter(
                 and_(
                     Violation.session_id == session_id,
@@ -10,6 +10,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -53,24 +54,7 @@ class FullscreenEnforcementService:
     def get_session_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
         """Get all fullscreen exit violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'fullscreen_exit'
-                )
-            ).order_by(Violation.timestamp.desc()).all()
-            
-            return [
-                {
-                    "id": violation.id,
-                    "session_id": violation.session_id,
-                    "timestamp": violation.timestamp,
-                    "details": violation.details,
-                    "filepath": violation.filepath
-                } for violation in violations
-            ]
+            return ViolationService.list_session_violations(db, session_id, 'fullscreen_exit')
         except Exception as e:
             logger.error(f"Error getting session fullscreen exit violations: {str(e)}")
             return []
@@ -79,8 +63,6 @@ class FullscreenEnforcementService:
     def get_fullscreen_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current fullscreen status for a session"""
         try:
-            from app.models.violation import Violation
-            
             # Get the most recent violation
             latest_violation = db.query(Violation).filter(
                 and_(
@@ -117,8 +99,6 @@ class FullscreenEnforcementService:
     def get_violation_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of fullscreen exit violations for a session"""
         try:
-            from app.models.violation import Violation
-            
             violations = db.query(Violation).filter(
                 and_(
                     Violation.session_id == session_id,
@@ -5,11 +5,12 @@ This module contains the business logic for gaze tracking monitoring.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -77,24 +78,7 @@ class GazeTrackingService:
     def get_session_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
         """Get all gaze violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'gaze_away'
-                )
-            ).order_by(Violation.timestamp.desc()).all()
-            
-            return [
-                {
-                    "id": violation.id,
-                    "session_id": violation.session_id,
-                    "timestamp": violation.timestamp,
-                    "details": violation.details,
-                    "filepath": violation.filepath
-                } for violation in violations
-            ]
+            return ViolationService.list_session_violations(db, session_id, 'gaze_away')
         except Exception as e:
             logger.error(f"Error getting session gaze violations: {str(e)}")
             return []
@@ -103,8 +87,6 @@ class GazeTrackingService:
     def get_gaze_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current gaze tracking status for a session"""
         try:
-            from app.models.violation import Violation
-            
             # Get the most recent violation
             latest_violation = db.query(Violation).filter(
                 and_(
@@ -176,16 +158,22 @@ class GazeTrackingService:
     def get_violation_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of gaze violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'gaze_away'
-                )
-            ).all()
-            
-            if not violations:
+            gaze_filter = and_(
+                Violation.session_id == session_id,
+                Violation.violation_type == 'gaze_away'
+            )
+            duration = Violation.details[('gaze_analysis', 'duration_seconds')].as_float()
+            
+            # Aggregate in the database instead of loading every violation; COUNT of the
+            # duration skips violations that didn't record one, as the average always has
+            total_violations, total_time_away, durations_recorded, last_violation = db.query(
+                func.count(Violation.id),
+                func.coalesce(func.sum(duration), 0),
+                func.count(duration),
+                func.max(Violation.timestamp)
+            ).filter(gaze_filter).one()
+            
+            if not total_violations:
                 return {
                     "session_id": session_id,
                     "total_violations": 0,
@@ -195,24 +183,20 @@ class GazeTrackingService:
                     "last_violation": None
                 }
             
-            total_violations = len(violations)
-            durations = []
-            directions = {}
-            
-            for violation in violations:
-                if violation.details and 'gaze_analysis' in violation.details:
-                    gaze_analysis = violation.details['gaze_analysis']
-                    
-                    duration = gaze_analysis.get('duration_seconds')
-                    if duration is not None:
-                        durations.append(duration)
-                    
-                    direction = gaze_analysis.get('gaze_direction', 'unknown')
-                    directions[direction] = directions.get(direction, 0) + 1
+            # Group on a subquery column; SQL Server won't match a GROUP BY against a
+            # select expression whose JSON path is sent as separate bound parameters
+            direction_rows = select(
+                func.coalesce(
+                    Violation.details[('gaze_analysis', 'gaze_direction')].as_string(), 'unknown'
+                ).label("direction")
+            ).where(gaze_filter).subquery()
+            directions = dict(
+                db.execute(
+                    select(direction_rows.c.direction, func.count()).group_by(direction_rows.c.direction)
+                ).all()
+            )
             
-            total_time_away = sum(durations)
-            average_duration = total_time_away / len(durations) if durations else 0
-            last_violation = max(violations, key=lambda x: x.timestamp).timestamp
+            average_duration = total_time_away / durations_recorded if durations_recorded else 0
             
             return {
                 "session_id": session_id,
@@ -7,9 +7,11 @@ This module contains the business logic for keyboard shortcuts monitoring.
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from typing import List, Optional, Dict, Any
+from collections import Counter
 from datetime import datetime
 import logging
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -70,25 +72,11 @@ class KeyboardShortcutsService:
     def get_session_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
         """Get all keyboard shortcut violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'keyboard_shortcut'
-                )
-            ).order_by(Violation.timestamp.desc()).all()
-            
-            return [
-                {
-                    "id": violation.id,
-                    "session_id": violation.session_id,
-                    "key_combination": violation.details.get('key_combination') if violation.details else None,
-                    "timestamp": violation.timestamp,
-                    "details": violation.details,
-                    "filepath": violation.filepath
-                } for violation in violations
-            ]
+            violations = ViolationService.list_session_violations(db, session_id, 'keyboard_shortcut')
+            for violation in violations:
+                details = violation["details"]
+                violation["key_combination"] = details.get('key_combination') if details else None
+            return violations
         except Exception as e:
             logger.error(f"Error getting session keyboard shortcut violations: {str(e)}")
             return []
@@ -97,8 +85,6 @@ class KeyboardShortcutsService:
     def get_keyboard_shortcuts_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current keyboard shortcuts status for a session"""
         try:
-            from app.models.violation import Violation
-            
             # Get the most recent violation
             latest_violation = db.query(Violation).filter(
                 and_(
@@ -135,8 +121,6 @@ class KeyboardShortcutsService:
     def get_violation_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of keyboard shortcut violations for a session"""
         try:
-            from app.models.violation import Violation
-            
             violations = db.query(Violation).filter(
                 and_(
                     Violation.session_id == session_id,
@@ -156,20 +140,19 @@ class KeyboardShortcutsService:
             last_violation = max(violations, key=lambda x: x.timestamp).timestamp
             
             # Find most used shortcut
-            shortcut_counts = {}
-            for violation in violations:
-                if violation.details and 'key_combination' in violation.details:
-                    key_combo = violation.details['key_combination']
-                    shortcut_counts[key_combo] = shortcut_counts.get(key_combo, 0) + 1
+            shortcut_counts = Counter(
+                violation.details['key_combination'] for violation in violations
+                if violation.details and 'key_combination' in violation.details
+            )
             
-            most_used_shortcut = max(shortcut_counts.items(), key=lambda x: x[1])[0] if shortcut_counts else None
+            most_used_shortcut = shortcut_counts.most_common(1)[0][0] if shortcut_counts else None
             
             return {
                 "session_id": session_id,
                 "total_violations": total_violations,
                 "most_used_shortcut": most_used_shortcut,
                 "last_violation": last_violation,
-                "shortcut_breakdown": shortcut_counts
+                "shortcut_breakdown": dict(shortcut_counts)
             }
         except Exception as e:
             logger.error(f"Error getting keyboard shortcuts summary: {str(e)}")
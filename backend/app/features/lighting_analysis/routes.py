@@ -4,9 +4,10 @@ Lighting Analysis Routes
 This module contains the API routes for lighting analysis monitoring.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 import logging
 from pydantic import BaseModel
 
@@ -17,6 +18,10 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/proctoring/lighting-analysis", tags=["Lighting Analysis"])
 
+class LightingBatchRequest(BaseModel):
+    brightness_levels: List[float]
+    previous_brightness: Optional[float] = None
+
 class LightingViolationRequest(BaseModel):
     session_id: int
     brightness_level: float
@@ -51,11 +56,16 @@ async def log_lighting_violation(
 @router.get("/session/{session_id}/violations")
 async def get_session_lighting_violations(
     session_id: int,
+    cursor: Optional[datetime] = Query(None, description="next_cursor.timestamp from the previous page"),
+    cursor_id: Optional[int] = Query(None, description="next_cursor.id from the previous page"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of violations to return"),
     db: Session = Depends(get_db)
 ):
-    """Get all lighting violations for a session"""
+    """Get a page of lighting violations for a session"""
+    if (cursor is None) != (cursor_id is None):
+        raise HTTPException(status_code=400, detail="cursor and cursor_id must be passed together")
     try:
-        return LightingAnalysisService.get_session_violations(db, session_id)
+        return LightingAnalysisService.get_session_violations(db, session_id, cursor=cursor, cursor_id=cursor_id, limit=limit)
     except Exception as e:
         logger.error(f"Error getting session lighting violations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -87,7 +97,7 @@ async def get_lighting_summary(
 @router.post("/analyze")
 async def analyze_lighting_condition(
     brightness_level: float,
-    previous_brightness: float = None
+    previous_brightness: Optional[float] = None
 ):
     """Analyze lighting condition based on brightness level"""
     try:
@@ -100,4 +110,20 @@ async def analyze_lighting_condition(
         }
     except Exception as e:
         logger.error(f"Error analyzing lighting condition: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze-batch")
+async def analyze_lighting_batch(request: LightingBatchRequest):
+    """Analyze a batch of consecutive brightness samples"""
+    try:
+        codes = LightingAnalysisService.analyze_lighting_batch(
+            request.brightness_levels, request.previous_brightness
+        )
+        conditions = [LightingAnalysisService.LIGHTING_CONDITIONS[code] for code in codes.tolist()]
+        return {
+            "lighting_conditions": conditions,
+            "violation_count": int((codes != 0).sum())
+        }
+    except Exception as e:
+        logger.error(f"Error analyzing lighting batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
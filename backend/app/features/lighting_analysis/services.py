@@ -5,16 +5,48 @@ This module contains the business logic for lighting analysis monitoring.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, or_, func, lambda_stmt, select
+from typing import Optional, Dict, Any
 from datetime import datetime
 import logging
 import json
+from collections import Counter
 
+import numpy as np
+
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
 
+
+def _lighting_filter(session_id: int):
+    """Filter clause matching the lighting violations of a session"""
+    return and_(
+        Violation.session_id == session_id,
+        Violation.violation_type == 'lighting_issue'
+    )
+
+
+# Lambda statements are compiled once and cached by SQLAlchemy; session_id is
+# extracted from the closure as a bound parameter on every call
+def _lighting_violations_stmt(session_id: int):
+    """Statement selecting the lighting violations of a session, newest first
+
+    Ties on timestamp are broken by id so the order is stable for pagination.
+    """
+    return lambda_stmt(
+        lambda: select(Violation).where(_lighting_filter(session_id))
+        .order_by(Violation.timestamp.desc(), Violation.id.desc())
+    )
+
+
+def _lighting_violation_count_stmt(session_id: int):
+    """Statement counting the lighting violations of a session"""
+    return lambda_stmt(
+        lambda: select(func.count(Violation.id)).where(_lighting_filter(session_id))
+    )
+
 class LightingAnalysisService:
     """Service class for lighting analysis operations"""
     
@@ -23,6 +55,9 @@ class LightingAnalysisService:
     BRIGHT_THRESHOLD = 0.8  # Above this is considered bright
     SUDDEN_CHANGE_THRESHOLD = 0.2  # Change greater than this is sudden
     
+    # Condition codes returned by analyze_lighting_batch, indexed by code
+    LIGHTING_CONDITIONS = ('normal', 'dark', 'bright', 'sudden_change')
+    
     @staticmethod
     def analyze_lighting_condition(brightness_level: float, previous_brightness: Optional[float] = None) -> str:
         """Analyze lighting condition based on brightness level"""
@@ -35,6 +70,29 @@ class LightingAnalysisService:
         else:
             return 'normal'
     
+    @staticmethod
+    def analyze_lighting_batch(brightness_levels: np.ndarray, previous_brightness: Optional[float] = None) -> np.ndarray:
+        """Analyze a batch of consecutive brightness samples in one vectorized pass
+        
+        Returns an int8 array of indices into LIGHTING_CONDITIONS, with the same
+        precedence as analyze_lighting_condition. Each sample is compared against
+        the one before it; the first sample is compared against previous_brightness.
+        """
+        brightness = np.asarray(brightness_levels, dtype=np.float64)
+        if brightness.size == 0:
+            return np.empty(0, dtype=np.int8)
+        
+        previous = np.empty_like(brightness)
+        previous[0] = previous_brightness or 0.0
+        previous[1:] = brightness[:-1]
+        
+        dark = brightness < LightingAnalysisService.DARK_THRESHOLD
+        bright = brightness > LightingAnalysisService.BRIGHT_THRESHOLD
+        # A previous level of 0 counts as "no previous sample", as in analyze_lighting_condition
+        sudden = (previous != 0) & (np.abs(brightness - previous) > LightingAnalysisService.SUDDEN_CHANGE_THRESHOLD)
+        
+        return np.where(dark, 1, np.where(bright, 2, np.where(sudden, 3, 0))).astype(np.int8)
+    
     @staticmethod
     def log_lighting_violation(
         db: Session, 
@@ -60,30 +118,42 @@ class LightingAnalysisService:
             )
             
             if violation:
-                logger.warning(f"Lighting violation logged for session {session_id}: condition={lighting_condition}, brightness={brightness_level}")
+                logger.warning("Lighting violation logged for session %s: condition=%s, brightness=%s", session_id, lighting_condition, brightness_level)
                 return True
             else:
-                logger.error(f"Failed to log lighting violation for session {session_id}")
+                logger.error("Failed to log lighting violation for session %s", session_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error logging lighting violation: {str(e)}")
+            logger.error("Error logging lighting violation: %s", e)
             return False
     
     @staticmethod
-    def get_session_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
-        """Get all lighting violations for a session"""
+    def get_session_violations(
+        db: Session,
+        session_id: int,
+        cursor: Optional[datetime] = None,
+        cursor_id: Optional[int] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """Get one page of lighting violations for a session, newest first
+        
+        Uses keyset pagination on (timestamp, id): pass the timestamp and id of the
+        returned next_cursor back as cursor and cursor_id to fetch the following
+        page. next_cursor is None on the last page.
+        """
         try:
-            from app.models.violation import Violation
+            stmt = _lighting_violations_stmt(session_id)
+            if cursor is not None and cursor_id is not None:
+                stmt += lambda s: s.where(or_(
+                    Violation.timestamp < cursor,
+                    and_(Violation.timestamp == cursor, Violation.id < cursor_id)
+                ))
+            stmt += lambda s: s.limit(limit)
             
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'lighting_issue'
-                )
-            ).order_by(Violation.timestamp.desc()).all()
+            violations = db.execute(stmt).scalars().all()
             
-            return [
+            items = [
                 {
                     "id": violation.id,
                     "session_id": violation.session_id,
@@ -92,31 +162,28 @@ class LightingAnalysisService:
                     "filepath": violation.filepath
                 } for violation in violations
             ]
+            return {
+                "items": items,
+                "next_cursor": {
+                    "timestamp": items[-1]["timestamp"],
+                    "id": items[-1]["id"]
+                } if len(items) == limit else None
+            }
         except Exception as e:
-            logger.error(f"Error getting session lighting violations: {str(e)}")
-            return []
+            logger.error("Error getting session lighting violations: %s", e)
+            return {"items": [], "next_cursor": None}
     
     @staticmethod
     def get_lighting_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current lighting status for a session"""
         try:
-            from app.models.violation import Violation
-            
             # Get the most recent violation
-            latest_violation = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'lighting_issue'
-                )
-            ).order_by(Violation.timestamp.desc()).first()
+            latest_violation = db.execute(
+                _lighting_violations_stmt(session_id) + (lambda stmt: stmt.limit(1))
+            ).scalars().first()
             
             # Count total violations
-            total_violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'lighting_issue'
-                )
-            ).count()
+            total_violations = db.execute(_lighting_violation_count_stmt(session_id)).scalar()
             
             # Get current lighting condition
             current_condition = 'normal'
@@ -135,7 +202,7 @@ class LightingAnalysisService:
                 "total_violations": total_violations
             }
         except Exception as e:
-            logger.error(f"Error getting lighting status: {str(e)}")
+            logger.error("Error getting lighting status: %s", e)
             return {
                 "session_id": session_id,
                 "current_brightness": None,
@@ -149,14 +216,7 @@ class LightingAnalysisService:
     def get_violation_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of lighting violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'lighting_issue'
-                )
-            ).all()
+            violations = db.execute(_lighting_violations_stmt(session_id)).scalars().all()
             
             if not violations:
                 return {
@@ -169,7 +229,7 @@ class LightingAnalysisService:
             
             total_violations = len(violations)
             brightness_levels = []
-            conditions = {}
+            conditions = Counter()
             
             for violation in violations:
                 if violation.details and 'lighting_analysis' in violation.details:
@@ -180,7 +240,7 @@ class LightingAnalysisService:
                     if brightness is not None:
                         brightness_levels.append(brightness)
                     
-                    conditions[condition] = conditions.get(condition, 0) + 1
+                    conditions[condition] += 1
             
             average_brightness = sum(brightness_levels) / len(brightness_levels) if brightness_levels else 0
             last_violation = max(violations, key=lambda x: x.timestamp).timestamp
@@ -189,11 +249,11 @@ class LightingAnalysisService:
                 "session_id": session_id,
                 "total_violations": total_violations,
                 "average_brightness": round(average_brightness, 3),
-                "lighting_conditions": conditions,
+                "lighting_conditions": dict(conditions),
                 "last_violation": last_violation
             }
         except Exception as e:
-            logger.error(f"Error getting lighting summary: {str(e)}")
+            logger.error("Error getting lighting summary: %s", e)
             return {
                 "session_id": session_id,
                 "total_violations": 0,
@@ -69,10 +69,17 @@ async def log_microphone_permission_grant(
 @router.get("/session/{session_id}/violation-check")
 async def check_microphone_permission_violation(
     session_id: int,
+    brief: bool = False,
     db: Session = Depends(get_db)
 ):
     """Check if there's a microphone permission violation for the session"""
     try:
+        if brief:
+            return {
+                "session_id": session_id,
+                "has_violation": MicrophonePermissionService.has_permission_violation(db, session_id)
+            }
+        
         result = MicrophonePermissionService.check_permission_violation(db, session_id)
         return {
             "session_id": session_id,
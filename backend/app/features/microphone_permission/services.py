@@ -10,6 +10,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
@@ -40,14 +41,14 @@ class MicrophonePermissionService:
             )
             
             if violation:
-                logger.info(f"Microphone permission violation logged for session {session_id}")
+                logger.info("Microphone permission violation logged for session %s", session_id)
                 return True
             else:
-                logger.error(f"Failed to log microphone permission violation for session {session_id}")
+                logger.error("Failed to log microphone permission violation for session %s", session_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error logging microphone permission violation: {str(e)}")
+            logger.error("Error logging microphone permission violation: %s", e)
             return False
     
     @staticmethod
@@ -59,10 +60,27 @@ class MicrophonePermissionService:
         """Log when microphone permission is granted (for tracking purposes)"""
         try:
             # For granted permissions, we just log it for tracking but don't create a violation
-            logger.info(f"Microphone permission granted for session {session_id}, device_info: {device_info}")
+            logger.info("Microphone permission granted for session %s, device_info: %s", session_id, device_info)
             return True
         except Exception as e:
-            logger.error(f"Error logging microphone permission grant: {str(e)}")
+            logger.error("Error logging microphone permission grant: %s", e)
+            return False
+    
+    @staticmethod
+    def has_permission_violation(db: Session, session_id: int) -> bool:
+        """Check whether any microphone permission violation exists for the session"""
+        try:
+            # EXISTS lets the database stop at the first match without sorting or loading rows
+            return db.query(
+                db.query(Violation).filter(
+                    and_(
+                        Violation.session_id == session_id,
+                        Violation.violation_type == 'microphone_permission_denied'
+                    )
+                ).exists()
+            ).scalar()
+        except Exception as e:
+            logger.error("Error checking permission violation: %s", e)
             return False
     
     @staticmethod
@@ -70,8 +88,6 @@ class MicrophonePermissionService:
         """Check if there's a microphone permission violation for the session"""
         try:
             # Query the violations table for microphone permission violations
-            from app.models.violation import Violation
-            
             violation = db.query(Violation).filter(
                 and_(
                     Violation.session_id == session_id,
@@ -92,7 +108,7 @@ class MicrophonePermissionService:
                     "details": None
                 }
         except Exception as e:
-            logger.error(f"Error checking permission violation: {str(e)}")
+            logger.error("Error checking permission violation: %s", e)
             return {
                 "has_violation": False,
                 "timestamp": None,
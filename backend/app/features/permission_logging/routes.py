@@ -4,11 +4,13 @@ Permission Logging Routes
 This module contains the API routes for permission logging.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, status
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 import logging
-from pydantic import BaseModel
+import orjson
+from pydantic import BaseModel, Field
 
 from app.database import get_db
 from .services import PermissionLoggingService
@@ -17,6 +19,22 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/proctoring/permission-logging", tags=["Permission Logging"])
 
+# The valid permission types never change at runtime, so encode the response once
+_VALID_PERMISSION_TYPES_JSON = orjson.dumps({
+    "valid_permission_types": PermissionLoggingService.VALID_PERMISSION_TYPES,
+    "total_count": len(PermissionLoggingService.VALID_PERMISSION_TYPES)
+})
+
+# Upper bound on the number of sessions a single bulk status request may ask for
+_MAX_BULK_STATUS_SESSIONS = 5000
+
+# Upper bound on the events in one bulk log request; this also bounds the session
+# IN (...) list well under SQL Server's ~2,100 parameter limit
+_MAX_BULK_LOG_EVENTS = 1000
+
+class PermissionStatusBulkRequest(BaseModel):
+    session_ids: List[int] = Field(..., max_length=_MAX_BULK_STATUS_SESSIONS)
+
 class PermissionLogRequest(BaseModel):
     session_id: int
     permission_type: str
@@ -28,28 +46,56 @@ class PermissionLogRequest(BaseModel):
 @router.post("/log")
 async def log_permission_event(
     permission: PermissionLogRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
-    """Log a permission event"""
+    """Log a permission event
+    
+    Denied permissions are written as violations in the background, so the
+    browser does not wait on the database insert.
+    """
+    if not PermissionLoggingService.validate_permission_type(permission.permission_type):
+        logger.error(f"Invalid permission type: {permission.permission_type}")
+        raise HTTPException(status_code=500, detail="Failed to log permission event")
+    
     try:
-        success = PermissionLoggingService.log_permission_event(
-            db=db,
-            session_id=permission.session_id,
-            permission_type=permission.permission_type,
-            granted=permission.granted,
-            device_info=permission.device_info,
-            error_message=permission.error_message,
-            additional_info=permission.additional_info
-        )
+        if permission.granted:
+            # Granted permissions never touch the database
+            logger.info(f"Permission event logged for session {permission.session_id}: {permission.permission_type} = True")
+        elif PermissionLoggingService.should_log_denial(permission.session_id, permission.permission_type):
+            background_tasks.add_task(
+                PermissionLoggingService.log_permission_event_in_background,
+                session_id=permission.session_id,
+                permission_type=permission.permission_type,
+                granted=False,
+                device_info=permission.device_info,
+                error_message=permission.error_message,
+                additional_info=permission.additional_info
+            )
         
-        if success:
-            return {"message": "Permission event logged successfully", "session_id": permission.session_id}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to log permission event")
+        return {"message": "Permission event logged successfully", "session_id": permission.session_id}
     except Exception as e:
         logger.error(f"Error logging permission event: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/log/bulk")
+async def log_permission_events_bulk(
+    permissions: List[PermissionLogRequest] = Body(..., max_length=_MAX_BULK_LOG_EVENTS),
+    db: Session = Depends(get_db)
+):
+    """Log a burst of permission events with a single multi-row insert"""
+    try:
+        logged = PermissionLoggingService.log_permission_events_bulk(
+            db, [permission.model_dump() for permission in permissions]
+        )
+        return {
+            "message": "Permission events logged successfully",
+            "total_events": len(permissions),
+            "violations_logged": logged
+        }
+    except Exception as e:
+        logger.error(f"Error bulk logging permission events: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/session/{session_id}/permissions")
 async def get_session_permissions(
     session_id: int,
@@ -57,7 +103,10 @@ async def get_session_permissions(
 ):
     """Get all permission events for a session"""
     try:
-        return PermissionLoggingService.get_session_permissions(db, session_id)
+        return Response(
+            content=PermissionLoggingService.get_session_permissions_json(db, session_id),
+            media_type="application/json"
+        )
     except Exception as e:
         logger.error(f"Error getting session permissions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -74,6 +123,18 @@ async def get_permission_status(
         logger.error(f"Error getting permission status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/sessions/status")
+async def get_permission_status_bulk(
+    request: PermissionStatusBulkRequest,
+    db: Session = Depends(get_db)
+):
+    """Get the current permission status for several sessions at once"""
+    try:
+        return PermissionLoggingService.get_permission_status_bulk(db, request.session_ids)
+    except Exception as e:
+        logger.error(f"Error getting bulk permission status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/session/{session_id}/summary")
 async def get_permission_summary(
     session_id: int,
@@ -90,10 +151,7 @@ async def get_permission_summary(
 async def get_valid_permission_types():
     """Get list of valid permission types"""
     try:
-        return {
-            "valid_permission_types": PermissionLoggingService.VALID_PERMISSION_TYPES,
-            "total_count": len(PermissionLoggingService.VALID_PERMISSION_TYPES)
-        }
+        return Response(content=_VALID_PERMISSION_TYPES_JSON, media_type="application/json")
     except Exception as e:
         logger.error(f"Error getting valid permission types: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
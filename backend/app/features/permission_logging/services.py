@@ -5,17 +5,69 @@ This module contains the business logic for permission logging.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import Text, and_, func, insert, lambda_stmt, select, type_coerce
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from cachetools import TTLCache
 import logging
+import threading
+import orjson
+import pytz
 
+from app.database import SessionLocal
+from app.models.test_session import TestSession
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
 
 logger = logging.getLogger(__name__)
 
+# Violation types produced by denied permissions and read back by the getters
+_PERMISSION_VIOLATION_TYPES = ('camera_permission_denied', 'microphone_permission_denied')
+_VALID_PERMISSION_TYPES = frozenset(('camera', 'microphone', 'screen', 'location'))
+_TYPE_TO_PERMISSION = {
+    'camera_permission_denied': 'camera',
+    'microphone_permission_denied': 'microphone',
+    'screen_permission_denied': 'screen',
+    'location_permission_denied': 'location'
+}
+_PERMISSION_VIOLATION_TYPE = {t: f"{t}_permission_denied" for t in _VALID_PERMISSION_TYPES}
+_DESCRIPTIONS = {t: f"User denied or revoked {t} access during test" for t in _VALID_PERMISSION_TYPES}
+
+# Permission types with a dedicated ViolationService logger; the rest go through log_violation
+_VIOLATION_LOGGERS = {
+    'camera': ViolationService.log_camera_permission_violation,
+    'microphone': ViolationService.log_microphone_permission_violation
+}
+
+# Proctoring dashboards poll the status and summary endpoints repeatedly while
+# writes are rare, so results are cached briefly per session and dropped as soon
+# as a new permission violation is logged for that session
+_status_cache = TTLCache(maxsize=4096, ttl=2.0)
+_summary_cache = TTLCache(maxsize=4096, ttl=2.0)
+_cache_lock = threading.RLock()
+
+# Students often hit "deny" repeatedly; the same denial arriving again within this
+# window is dropped instead of being written as another violation
+_DENIAL_COALESCE_SECONDS = 0.25
+_recent_denials = TTLCache(maxsize=4096, ttl=_DENIAL_COALESCE_SECONDS)
+
+# SQL Server rejects statements with more than ~2,100 bound parameters, so the
+# bulk status lookup binds session ids in chunks well under that limit
+_BULK_STATUS_CHUNK_SIZE = 1000
+
+
+def _invalidate_cached_permissions(session_id: int) -> None:
+    """Drop cached status and summary results for a session"""
+    with _cache_lock:
+        _status_cache.pop(session_id, None)
+        _summary_cache.pop(session_id, None)
+
 class PermissionLoggingService:
-    """Service class for permission logging operations"""
+    """Service class for permission logging operations
+    
+    The getters are read-only: they select plain columns instead of Violation
+    entities, so they never touch the session's identity map.
+    """
     
     # Valid permission types
     VALID_PERMISSION_TYPES = ['camera', 'microphone', 'screen', 'location']
@@ -23,7 +75,7 @@ class PermissionLoggingService:
     @staticmethod
     def validate_permission_type(permission_type: str) -> bool:
         """Validate if permission type is supported"""
-        return permission_type in PermissionLoggingService.VALID_PERMISSION_TYPES
+        return permission_type in _VALID_PERMISSION_TYPES
     
     @staticmethod
     def log_permission_event(
@@ -39,56 +91,41 @@ class PermissionLoggingService:
         try:
             # Validate permission type
             if not PermissionLoggingService.validate_permission_type(permission_type):
-                logger.error(f"Invalid permission type: {permission_type}")
+                logger.error("Invalid permission type: %s", permission_type)
                 return False
             
-            # Log violation if permission was denied
-            if not granted:
-                if permission_type == 'camera':
-                    violation = ViolationService.log_camera_permission_violation(
-                        db=db,
-                        session_id=session_id,
-                        details={
-                            "error_type": "permission_denied",
-                            "description": "User denied or revoked camera access during test",
-                            "error_message": error_message,
-                            "device_info": device_info,
-                            "additional_info": additional_info or {}
-                        }
-                    )
-                elif permission_type == 'microphone':
-                    violation = ViolationService.log_microphone_permission_violation(
-                        db=db,
-                        session_id=session_id,
-                        details={
-                            "error_type": "permission_denied",
-                            "description": "User denied or revoked microphone access during test",
-                            "error_message": error_message,
-                            "device_info": device_info,
-                            "additional_info": additional_info or {}
-                        }
-                    )
-                else:
-                    # For other permission types, log as a general violation
-                    violation = ViolationService.log_violation(
-                        db=db,
-                        session_id=session_id,
-                        violation_type=f"{permission_type}_permission_denied",
-                        details={
-                            "error_type": "permission_denied",
-                            "description": f"User denied or revoked {permission_type} access during test",
-                            "error_message": error_message,
-                            "device_info": device_info,
-                            "additional_info": additional_info or {}
-                        }
-                    )
-                
-                if violation:
-                    logger.warning(f"Permission violation logged for session {session_id}: {permission_type} denied")
-                else:
-                    logger.error(f"Failed to log permission violation for session {session_id}")
+            # Granted permissions never produce a violation, so there is no DB work to do
+            if granted:
+                logger.info("Permission event logged for session %s: %s = %s", session_id, permission_type, granted)
+                return True
+            
+            # Permission was denied: log a violation
+            details = {
+                "error_type": "permission_denied",
+                "description": _DESCRIPTIONS[permission_type],
+                "error_message": error_message,
+                "device_info": device_info,
+                "additional_info": additional_info or {}
+            }
+            log_violation = _VIOLATION_LOGGERS.get(permission_type)
+            if log_violation is not None:
+                violation = log_violation(db=db, session_id=session_id, details=details)
+            else:
+                # For other permission types, log as a general violation
+                violation = ViolationService.log_violation(
+                    db=db,
+                    session_id=session_id,
+                    violation_type=_PERMISSION_VIOLATION_TYPE[permission_type],
+                    details=details
+                )
             
-            logger.info(f"Permission event logged for session {session_id}: {permission_type} = {granted}")
+            if violation:
+                _invalidate_cached_permissions(session_id)
+                logger.warning("Permission violation logged for session %s: %s denied", session_id, permission_type)
+            else:
+                logger.error("Failed to log permission violation for session %s", session_id)
+            
+            logger.info("Permission event logged for session %s: %s = %s", session_id, permission_type, granted)
             return True
             
         except Exception as e:
@@ -96,27 +133,159 @@ class PermissionLoggingService:
             return False
     
     @staticmethod
-    def get_session_permissions(db: Session, session_id: int) -> List[Dict[str, Any]]:
-        """Get all permission events for a session"""
+    def should_log_denial(session_id: int, permission_type: str) -> bool:
+        """Return False if the same denial was already accepted within the coalescing window"""
+        key = (session_id, permission_type)
+        with _cache_lock:
+            if key in _recent_denials:
+                return False
+            _recent_denials[key] = True
+        return True
+    
+    @staticmethod
+    def log_permission_event_in_background(
+        session_id: int,
+        permission_type: str,
+        granted: bool,
+        device_info: Optional[str] = None,
+        error_message: Optional[str] = None,
+        additional_info: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Log a permission event on its own database session
+        
+        Meant to run as a background task after the response has been sent, when
+        the request's session is no longer available.
+        """
+        db = SessionLocal()
+        try:
+            PermissionLoggingService.log_permission_event(
+                db=db,
+                session_id=session_id,
+                permission_type=permission_type,
+                granted=granted,
+                device_info=device_info,
+                error_message=error_message,
+                additional_info=additional_info
+            )
+        finally:
+            db.close()
+    
+    @staticmethod
+    def log_permission_events_bulk(db: Session, events: List[Dict[str, Any]]) -> int:
+        """Log a batch of permission events with a single multi-row INSERT
+        
+        Intended for replaying event streams. Each event is a dict with the same
+        fields as log_permission_event plus session_id. Granted events, invalid
+        permission types and unknown sessions are skipped.
+        
+        Returns the number of violations inserted. Database errors are rolled back
+        and re-raised, so a failed insert is never reported as nothing to log.
+        """
         try:
-            from app.models.violation import Violation
+            session_ids = {event.get("session_id") for event in events}
+            existing_sessions = {
+                row.id for row in db.query(TestSession.id).filter(TestSession.id.in_(session_ids))
+            }
+            
+            IST = pytz.timezone('Asia/Kolkata')
+            now = datetime.now(IST)
+            rows = []
+            for event in events:
+                permission_type = event.get("permission_type")
+                if not PermissionLoggingService.validate_permission_type(permission_type):
+                    logger.error("Invalid permission type: %s", permission_type)
+                    continue
+                if event.get("granted"):
+                    continue
+                if event.get("session_id") not in existing_sessions:
+                    logger.warning("Session %s not found. Violation will not be saved.", event.get("session_id"))
+                    continue
+                
+                rows.append({
+                    "session_id": event["session_id"],
+                    "violation_type": _PERMISSION_VIOLATION_TYPE[permission_type],
+                    "timestamp": now,
+                    "details": {
+                        "error_type": "permission_denied",
+                        "description": _DESCRIPTIONS[permission_type],
+                        "error_message": event.get("error_message"),
+                        "device_info": event.get("device_info"),
+                        "additional_info": event.get("additional_info") or {}
+                    },
+                    "filepath": None
+                })
+            
+            if not rows:
+                return 0
+            
+            db.execute(insert(Violation), rows)
+            db.commit()
+            for session_id in {row["session_id"] for row in rows}:
+                _invalidate_cached_permissions(session_id)
+            logger.warning("Bulk logged %s permission violations", len(rows))
+            return len(rows)
             
-            # Get all permission-related violations
-            violations = db.query(Violation).filter(
+        except Exception as e:
+            logger.error("Error bulk logging permission events: %s", e)
+            db.rollback()
+            raise
+    
+    @staticmethod
+    def _fetch_permission_violations(db: Session, session_id: int) -> List[Any]:
+        """Load the permission violations of a session once, newest first
+        
+        Selects plain columns rather than Violation entities, so rows come back as
+        lightweight tuples without identity-map or attribute-instrumentation cost.
+        details is returned as the raw stored JSON text; callers decide whether to
+        parse it or pass it through to the response unchanged.
+        """
+        # lambda_stmt compiles the SQL once; session_id is rebound on each call
+        return db.execute(lambda_stmt(
+            lambda: select(
+                Violation.id,
+                Violation.session_id,
+                Violation.timestamp,
+                Violation.violation_type,
+                type_coerce(Violation.details, Text).label('details'),
+                Violation.filepath
+            ).where(
                 and_(
                     Violation.session_id == session_id,
-                    Violation.violation_type.in_(['camera_permission_denied', 'microphone_permission_denied'])
+                    Violation.violation_type.in_(_PERMISSION_VIOLATION_TYPES)
                 )
-            ).order_by(Violation.timestamp.desc()).all()
+            ).order_by(Violation.timestamp.desc())
+        )).all()
+    
+    @staticmethod
+    def _fetch_permission_aggregates(db: Session, session_id: int) -> List[Any]:
+        """Get (violation_type, latest timestamp, count) for each permission violation type"""
+        return db.execute(lambda_stmt(
+            lambda: select(
+                Violation.violation_type,
+                func.max(Violation.timestamp),
+                func.count(Violation.id)
+            ).where(
+                and_(
+                    Violation.session_id == session_id,
+                    Violation.violation_type.in_(_PERMISSION_VIOLATION_TYPES)
+                )
+            ).group_by(Violation.violation_type)
+        )).all()
+    
+    @staticmethod
+    def get_session_permissions(db: Session, session_id: int) -> List[Dict[str, Any]]:
+        """Get all permission events for a session"""
+        try:
+            violations = PermissionLoggingService._fetch_permission_violations(db, session_id)
             
             return [
                 {
                     "id": violation.id,
                     "session_id": violation.session_id,
                     "timestamp": violation.timestamp,
-                    "permission_type": violation.violation_type.replace('_permission_denied', ''),
+                    "permission_type": _TYPE_TO_PERMISSION[violation.violation_type],
                     "granted": False,  # All violations are for denied permissions
-                    "details": violation.details,
+                    "details": orjson.loads(violation.details) if violation.details is not None else None,
                     "filepath": violation.filepath
                 } for violation in violations
             ]
@@ -124,112 +293,158 @@ class PermissionLoggingService:
             logger.error(f"Error getting session permissions: {str(e)}")
             return []
     
+    @staticmethod
+    def get_session_permissions_json(db: Session, session_id: int) -> bytes:
+        """Get all permission events for a session as an encoded JSON array
+        
+        Same content as get_session_permissions, but the stored details JSON is
+        embedded as-is instead of being parsed and re-serialized for every row.
+        """
+        try:
+            violations = PermissionLoggingService._fetch_permission_violations(db, session_id)
+            
+            return orjson.dumps([
+                {
+                    "id": violation.id,
+                    "session_id": violation.session_id,
+                    "timestamp": violation.timestamp,
+                    "permission_type": _TYPE_TO_PERMISSION[violation.violation_type],
+                    "granted": False,  # All violations are for denied permissions
+                    "details": orjson.Fragment(violation.details) if violation.details is not None else None,
+                    "filepath": violation.filepath
+                } for violation in violations
+            ])
+        except Exception as e:
+            logger.error(f"Error getting session permissions: {str(e)}")
+            return b"[]"
+    
+    @staticmethod
+    def _build_permission_status(session_id: int, rows: List[Any]) -> Dict[str, Any]:
+        """Build a permission status dict from (violation_type, latest timestamp, count) rows"""
+        denied_types = {violation_type for violation_type, _, _ in rows}
+        total_violations = sum(count for _, _, count in rows)
+        last_permission_check = max((timestamp for _, timestamp, _ in rows), default=None)
+        
+        return {
+            "session_id": session_id,
+            "camera_granted": 'camera_permission_denied' not in denied_types,  # No violation means granted
+            "microphone_granted": 'microphone_permission_denied' not in denied_types,  # No violation means granted
+            "screen_granted": True,  # Not tracked in violations
+            "location_granted": True,  # Not tracked in violations
+            "total_permissions_requested": total_violations,
+            "last_permission_check": last_permission_check
+        }
+    
     @staticmethod
     def get_permission_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current permission status for a session"""
+        with _cache_lock:
+            cached = _status_cache.get(session_id)
+        if cached is not None:
+            return cached
+        
         try:
-            from app.models.violation import Violation
-            
-            # Check for camera permission violations
-            camera_violation = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'camera_permission_denied'
-                )
-            ).order_by(Violation.timestamp.desc()).first()
+            # One aggregate query gives the latest timestamp and count per violation type
+            rows = PermissionLoggingService._fetch_permission_aggregates(db, session_id)
             
-            # Check for microphone permission violations
-            microphone_violation = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'microphone_permission_denied'
-                )
-            ).order_by(Violation.timestamp.desc()).first()
-            
-            # Get total violations
-            total_violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type.in_(['camera_permission_denied', 'microphone_permission_denied'])
-                )
-            ).count()
-            
-            # Determine last permission check
-            last_permission_check = None
-            if camera_violation or microphone_violation:
-                violations = [v for v in [camera_violation, microphone_violation] if v]
-                last_permission_check = max(violations, key=lambda x: x.timestamp).timestamp
+            status = PermissionLoggingService._build_permission_status(session_id, rows)
+            with _cache_lock:
+                _status_cache[session_id] = status
+            return status
+        except Exception as e:
+            logger.error(f"Error getting permission status: {str(e)}")
+            return PermissionLoggingService._unknown_permission_status(session_id, str(e))
+    
+    @staticmethod
+    def _unknown_permission_status(session_id: int, error: str) -> Dict[str, Any]:
+        """Status returned when the lookup failed; nothing is reported as granted"""
+        return {
+            "session_id": session_id,
+            "camera_granted": None,
+            "microphone_granted": None,
+            "screen_granted": None,
+            "location_granted": None,
+            "total_permissions_requested": None,
+            "last_permission_check": None,
+            "error": error
+        }
+    
+    @staticmethod
+    def get_permission_status_bulk(db: Session, session_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Get the current permission status for several sessions with one query per chunk of ids"""
+        try:
+            rows_by_session = {session_id: [] for session_id in session_ids}
+            unique_ids = list(rows_by_session)
+            for start in range(0, len(unique_ids), _BULK_STATUS_CHUNK_SIZE):
+                chunk = unique_ids[start:start + _BULK_STATUS_CHUNK_SIZE]
+                rows = db.execute(lambda_stmt(
+                    lambda: select(
+                        Violation.session_id,
+                        Violation.violation_type,
+                        func.max(Violation.timestamp),
+                        func.count(Violation.id)
+                    ).where(
+                        and_(
+                            Violation.session_id.in_(chunk),
+                            Violation.violation_type.in_(_PERMISSION_VIOLATION_TYPES)
+                        )
+                    ).group_by(Violation.session_id, Violation.violation_type)
+                )).all()
+                for session_id, violation_type, last_timestamp, count in rows:
+                    rows_by_session[session_id].append((violation_type, last_timestamp, count))
             
             return {
-                "session_id": session_id,
-                "camera_granted": camera_violation is None,  # No violation means granted
-                "microphone_granted": microphone_violation is None,  # No violation means granted
-                "screen_granted": True,  # Not tracked in violations
-                "location_granted": True,  # Not tracked in violations
-                "total_permissions_requested": total_violations,
-                "last_permission_check": last_permission_check
+                session_id: PermissionLoggingService._build_permission_status(session_id, session_rows)
+                for session_id, session_rows in rows_by_session.items()
             }
         except Exception as e:
-            logger.error(f"Error getting permission status: {str(e)}")
+            logger.error(f"Error getting bulk permission status: {str(e)}")
             return {
-                "session_id": session_id,
-                "camera_granted": True,
-                "microphone_granted": True,
-                "screen_granted": True,
-                "location_granted": True,
-                "total_permissions_requested": 0,
-                "last_permission_check": None,
-                "error": str(e)
+                session_id: PermissionLoggingService._unknown_permission_status(session_id, str(e))
+                for session_id in session_ids
             }
     
     @staticmethod
     def get_permission_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of permission events for a session"""
+        with _cache_lock:
+            cached = _summary_cache.get(session_id)
+        if cached is not None:
+            return cached
+        
         try:
-            from app.models.violation import Violation
+            rows = PermissionLoggingService._fetch_permission_aggregates(db, session_id)
             
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type.in_(['camera_permission_denied', 'microphone_permission_denied'])
-                )
-            ).all()
-            
-            if not violations:
-                return {
-                    "session_id": session_id,
-                    "total_permissions": 0,
-                    "permission_types": {},
-                    "granted_permissions": {"camera": True, "microphone": True, "screen": True, "location": True},
-                    "last_permission_check": None
-                }
-            
-            total_permissions = len(violations)
-            last_permission_check = max(violations, key=lambda x: x.timestamp).timestamp
+            total_permissions = sum(count for _, _, count in rows)
+            last_permission_check = max((timestamp for _, timestamp, _ in rows), default=None)
             
             # Count by permission type
             permission_types = {}
             granted_permissions = {"camera": True, "microphone": True, "screen": True, "location": True}
             
-            for violation in violations:
-                permission_type = violation.violation_type.replace('_permission_denied', '')
-                permission_types[permission_type] = permission_types.get(permission_type, 0) + 1
+            for violation_type, _, count in rows:
+                permission_type = _TYPE_TO_PERMISSION[violation_type]
+                permission_types[permission_type] = count
                 granted_permissions[permission_type] = False  # Has violation means denied
             
-            return {
+            summary = {
                 "session_id": session_id,
                 "total_permissions": total_permissions,
                 "permission_types": permission_types,
                 "granted_permissions": granted_permissions,
                 "last_permission_check": last_permission_check
             }
+            with _cache_lock:
+                _summary_cache[session_id] = summary
+            return summary
         except Exception as e:
             logger.error(f"Error getting permission summary: {str(e)}")
             return {
                 "session_id": session_id,
-                "total_permissions": 0,
+                "total_permissions": None,
                 "permission_types": {},
-                "granted_permissions": {"camera": True, "microphone": True, "screen": True, "location": True},
+                # Unknown rather than granted, as in _unknown_permission_status
+                "granted_permissions": {"camera": None, "microphone": None, "screen": None, "location": None},
                 "last_permission_check": None,
                 "error": str(e)
             } 
\ No newline at end of file
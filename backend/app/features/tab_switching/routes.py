@@ -4,9 +4,10 @@ Tab Switching Routes
 This module contains the API routes for tab switching monitoring.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 from pydantic import BaseModel
 
@@ -15,7 +16,7 @@ from .services import TabSwitchingService
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/proctoring/tab-switching", tags=["Tab Switching"])
+router = APIRouter(prefix="/api/proctoring/tab-switching", tags=["Tab Switching"], default_response_class=ORJSONResponse)
 
 class TabSwitchingViolationRequest(BaseModel):
     session_id: int
@@ -30,6 +31,18 @@ async def log_tab_switching_violation(
 ):
     """Log a tab switching violation"""
     try:
+        if TabSwitchingService.queue_tab_switching_violation(
+            session_id=violation.session_id,
+            duration_seconds=violation.duration_seconds,
+            screenshot_path=violation.screenshot_path,
+            additional_info=violation.additional_info
+        ):
+            return ORJSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={"message": "Tab switching violation queued for logging", "session_id": violation.session_id}
+            )
+        
+        # Writer unavailable or backed up; log it on this request instead
         success = TabSwitchingService.log_tab_switching_violation(
             db=db,
             session_id=violation.session_id,
@@ -43,19 +56,21 @@ async def log_tab_switching_violation(
         else:
             raise HTTPException(status_code=500, detail="Failed to log tab switching violation")
     except Exception as e:
-        logger.error(f"Error logging tab switching violation: {str(e)}")
+        logger.error("Error logging tab switching violation: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/session/{session_id}/violations")
 async def get_session_tab_switching_violations(
     session_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of violations to return"),
+    offset: int = Query(0, ge=0, description="Number of newest violations to skip"),
     db: Session = Depends(get_db)
 ):
-    """Get all tab switching violations for a session"""
+    """Get tab switching violations for a session, optionally paginated"""
     try:
-        return TabSwitchingService.get_session_violations(db, session_id)
+        return TabSwitchingService.get_session_violations(db, session_id, limit=limit, offset=offset)
     except Exception as e:
-        logger.error(f"Error getting session tab switching violations: {str(e)}")
+        logger.error("Error getting session tab switching violations: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/session/{session_id}/status")
@@ -67,7 +82,7 @@ async def get_tab_switching_status(
     try:
         return TabSwitchingService.get_tab_switching_status(db, session_id)
     except Exception as e:
-        logger.error(f"Error getting tab switching status: {str(e)}")
+        logger.error("Error getting tab switching status: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/session/{session_id}/summary")
@@ -79,5 +94,5 @@ async def get_tab_switching_summary(
     try:
         return TabSwitchingService.get_violation_summary(db, session_id)
     except Exception as e:
-        logger.error(f"Error getting tab switching summary: {str(e)}")
+        logger.error("Error getting tab switching summary: %s", e)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
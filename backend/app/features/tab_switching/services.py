@@ -5,18 +5,51 @@ This module contains the business logic for tab switching monitoring.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
+from app.services.violation_writer import enqueue_violation
 
 logger = logging.getLogger(__name__)
 
 class TabSwitchingService:
     """Service class for tab switching operations"""
     
+    @staticmethod
+    def _violation_details(
+        duration_seconds: Optional[float] = None,
+        additional_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build the details stored with a tab switching violation"""
+        return {
+            "error_type": "tab_switch",
+            "description": "User switched away from test tab",
+            "duration_seconds": duration_seconds,
+            "additional_info": additional_info or {}
+        }
+    
+    @staticmethod
+    def queue_tab_switching_violation(
+        session_id: int,
+        duration_seconds: Optional[float] = None,
+        screenshot_path: Optional[str] = None,
+        additional_info: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Hand a tab switching violation to the background batch writer
+        
+        Returns False if the writer can't take it, in which case use log_tab_switching_violation.
+        """
+        return enqueue_violation(
+            session_id,
+            'tab_switch',
+            TabSwitchingService._violation_details(duration_seconds, additional_info),
+            screenshot_path
+        )
+    
     @staticmethod
     def log_tab_switching_violation(
         db: Session, 
@@ -27,86 +60,67 @@ class TabSwitchingService:
     ) -> bool:
         """Log a tab switching violation"""
         try:
-            details = {
-                "error_type": "tab_switch",
-                "description": "User switched away from test tab",
-                "duration_seconds": duration_seconds,
-                "additional_info": additional_info or {}
-            }
-            
-            violation = ViolationService.log_tab_switch_violation(
-                db=db,
-                session_id=session_id,
-                filepath=screenshot_path
+            violation = ViolationService.log_violation(
+                db,
+                session_id,
+                'tab_switch',
+                TabSwitchingService._violation_details(duration_seconds, additional_info),
+                screenshot_path
             )
             
             if violation:
-                logger.warning(f"Tab switching violation logged for session {session_id}: duration={duration_seconds}s")
+                logger.warning("Tab switching violation logged for session %s: duration=%ss", session_id, duration_seconds)
                 return True
             else:
-                logger.error(f"Failed to log tab switching violation for session {session_id}")
+                logger.error("Failed to log tab switching violation for session %s", session_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error logging tab switching violation: {str(e)}")
+            logger.error("Error logging tab switching violation: %s", e)
             return False
     
     @staticmethod
-    def get_session_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
-        """Get all tab switching violations for a session"""
+    def get_session_violations(
+        db: Session,
+        session_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Get tab switching violations for a session, newest first
+        
+        limit/offset page through the list; by default every violation is returned.
+        """
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'tab_switch'
-                )
-            ).order_by(Violation.timestamp.desc()).all()
-            
-            return [
-                {
-                    "id": violation.id,
-                    "session_id": violation.session_id,
-                    "timestamp": violation.timestamp,
-                    "details": violation.details,
-                    "filepath": violation.filepath
-                } for violation in violations
-            ]
+            return ViolationService.list_session_violations(
+                db, session_id, 'tab_switch', limit=limit, offset=offset
+            )
         except Exception as e:
-            logger.error(f"Error getting session tab switching violations: {str(e)}")
+            logger.error("Error getting session tab switching violations: %s", e)
             return []
     
     @staticmethod
     def get_tab_switching_status(db: Session, session_id: int) -> Dict[str, Any]:
         """Get the current tab switching status for a session"""
         try:
-            from app.models.violation import Violation
-            
-            # Get the most recent violation
-            latest_violation = db.query(Violation).filter(
+            # Get the most recent violation time and the total count in one round trip
+            last_violation, total_violations = db.query(
+                func.max(Violation.timestamp),
+                func.count(Violation.id)
+            ).filter(
                 and_(
                     Violation.session_id == session_id,
                     Violation.violation_type == 'tab_switch'
                 )
-            ).order_by(Violation.timestamp.desc()).first()
-            
-            # Count total violations
-            total_violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'tab_switch'
-                )
-            ).count()
+            ).one()
             
             return {
                 "session_id": session_id,
-                "is_active": latest_violation is None,  # Active if no recent violations
-                "last_violation": latest_violation.timestamp if latest_violation else None,
+                "is_active": total_violations == 0,  # Active if no recent violations
+                "last_violation": last_violation,
                 "total_violations": total_violations
             }
         except Exception as e:
-            logger.error(f"Error getting tab switching status: {str(e)}")
+            logger.error("Error getting tab switching status: %s", e)
             return {
                 "session_id": session_id,
                 "is_active": True,
@@ -119,16 +133,19 @@ class TabSwitchingService:
     def get_violation_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of tab switching violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
+            # Aggregate in the database instead of loading every violation
+            total_violations, total_duration, last_violation = db.query(
+                func.count(Violation.id),
+                func.coalesce(func.sum(Violation.details['duration_seconds'].as_float()), 0),
+                func.max(Violation.timestamp)
+            ).filter(
                 and_(
                     Violation.session_id == session_id,
                     Violation.violation_type == 'tab_switch'
                 )
-            ).all()
+            ).one()
             
-            if not violations:
+            if not total_violations:
                 return {
                     "session_id": session_id,
                     "total_violations": 0,
@@ -137,10 +154,7 @@ class TabSwitchingService:
                     "last_violation": None
                 }
             
-            total_violations = len(violations)
-            total_duration = sum(v.details.get('duration_seconds', 0) for v in violations if v.details)
-            average_duration = total_duration / total_violations if total_violations > 0 else 0
-            last_violation = max(violations, key=lambda x: x.timestamp).timestamp
+            average_duration = total_duration / total_violations
             
             return {
                 "session_id": session_id,
@@ -150,7 +164,7 @@ class TabSwitchingService:
                 "last_violation": last_violation
             }
         except Exception as e:
-            logger.error(f"Error getting tab switching summary: {str(e)}")
+            logger.error("Error getting tab switching summary: %s", e)
             return {
                 "session_id": session_id,
                 "total_violations": 0,
@@ -20,9 +20,11 @@ Usage:
 """
 
 from .routes import router
-from .services import WindowBlurService
+from .services import WindowBlurService, WindowBlurStatus, WindowBlurSummary
 
 __all__ = [
     'router',
     'WindowBlurService', 
+    'WindowBlurStatus',
+    'WindowBlurSummary',
 ] 
\ No newline at end of file
@@ -5,6 +5,7 @@ This module contains the API routes for window blur monitoring.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 import logging
@@ -15,7 +16,7 @@ from .services import WindowBlurService
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/proctoring/window-blur", tags=["Window Blur"])
+router = APIRouter(prefix="/api/proctoring/window-blur", tags=["Window Blur"], default_response_class=ORJSONResponse)
 
 class WindowBlurViolationRequest(BaseModel):
     session_id: int
@@ -30,6 +31,18 @@ async def log_window_blur_violation(
 ):
     """Log a window blur violation"""
     try:
+        if WindowBlurService.queue_window_blur_violation(
+            session_id=violation.session_id,
+            duration_seconds=violation.duration_seconds,
+            screenshot_path=violation.screenshot_path,
+            additional_info=violation.additional_info
+        ):
+            return ORJSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={"message": "Window blur violation queued for logging", "session_id": violation.session_id}
+            )
+        
+        # Writer unavailable or backed up; log it on this request instead
         success = WindowBlurService.log_window_blur_violation(
             db=db,
             session_id=violation.session_id,
@@ -43,7 +56,7 @@ async def log_window_blur_violation(
         else:
             raise HTTPException(status_code=500, detail="Failed to log window blur violation")
     except Exception as e:
-        logger.error(f"Error logging window blur violation: {str(e)}")
+        logger.error("Error logging window blur violation: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/session/{session_id}/violations")
@@ -55,7 +68,7 @@ async def get_session_window_blur_violations(
     try:
         return WindowBlurService.get_session_violations(db, session_id)
     except Exception as e:
-        logger.error(f"Error getting session window blur violations: {str(e)}")
+        logger.error("Error getting session window blur violations: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/session/{session_id}/status")
@@ -67,7 +80,7 @@ async def get_window_blur_status(
     try:
         return WindowBlurService.get_window_blur_status(db, session_id)
     except Exception as e:
-        logger.error(f"Error getting window blur status: {str(e)}")
+        logger.error("Error getting window blur status: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/session/{session_id}/summary")
@@ -79,5 +92,5 @@ async def get_window_blur_summary(
     try:
         return WindowBlurService.get_violation_summary(db, session_id)
     except Exception as e:
-        logger.error(f"Error getting window blur summary: {str(e)}")
+        logger.error("Error getting window blur summary: %s", e)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
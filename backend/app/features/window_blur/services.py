@@ -5,18 +5,95 @@ This module contains the business logic for window blur monitoring.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, literal
+from cachetools import TTLCache
+from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
+import threading
 
+from app.models.violation import Violation
 from app.services.violation_service import ViolationService
+from app.services.violation_writer import add_commit_listener, enqueue_violation
 
 logger = logging.getLogger(__name__)
 
+# Stored in violations.violation_type. Reads filter on it as an inline literal so
+# SQL Server can use the filtered ix_violation_window_blur_session_ts index.
+_VIOLATION_TYPE = 'window_blur'
+
+# The proctoring frontend polls status and summary for an in-progress session and
+# the answer rarely changes between polls, so results are cached briefly per
+# session and dropped as soon as a new window blur violation is committed for it,
+# whether written directly or by the background batch writer
+_status_cache = TTLCache(maxsize=10_000, ttl=2.0)
+_summary_cache = TTLCache(maxsize=10_000, ttl=2.0)
+_cache_lock = threading.Lock()
+
+
+def _invalidate_cached_reads(session_id: int) -> None:
+    """Drop cached status and summary results for a session"""
+    with _cache_lock:
+        _status_cache.pop(session_id, None)
+        _summary_cache.pop(session_id, None)
+
+add_commit_listener(_VIOLATION_TYPE, _invalidate_cached_reads)
+
+@dataclass(slots=True, frozen=True)
+class WindowBlurStatus:
+    """Current window blur status for a session"""
+    session_id: int
+    is_focused: bool
+    last_violation: Optional[datetime]
+    total_violations: int
+    error: Optional[str] = None
+
+@dataclass(slots=True, frozen=True)
+class WindowBlurSummary:
+    """Window blur totals for a session"""
+    session_id: int
+    total_violations: int
+    average_duration: float
+    total_time_blurred: float
+    last_violation: Optional[datetime]
+    error: Optional[str] = None
+
 class WindowBlurService:
     """Service class for window blur operations"""
     
+    @staticmethod
+    def _violation_details(
+        duration_seconds: Optional[float] = None,
+        additional_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Build the details stored with a window blur violation"""
+        return {
+            "error_type": "window_focus_lost",
+            "description": "Test window lost focus",
+            "duration_seconds": duration_seconds,
+            "additional_info": additional_info or {}
+        }
+    
+    @staticmethod
+    def queue_window_blur_violation(
+        session_id: int,
+        duration_seconds: Optional[float] = None,
+        screenshot_path: Optional[str] = None,
+        additional_info: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Hand a window blur violation to the background batch writer
+        
+        Returns False if the writer can't take it, in which case use log_window_blur_violation.
+        """
+        # Cached reads are dropped by the commit listener once the writer commits the row
+        return enqueue_violation(
+            session_id,
+            _VIOLATION_TYPE,
+            WindowBlurService._violation_details(duration_seconds, additional_info),
+            screenshot_path
+        )
+    
     @staticmethod
     def log_window_blur_violation(
         db: Session, 
@@ -27,135 +104,104 @@ class WindowBlurService:
     ) -> bool:
         """Log a window blur violation"""
         try:
-            details = {
-                "error_type": "window_focus_lost",
-                "description": "Test window lost focus",
-                "duration_seconds": duration_seconds,
-                "additional_info": additional_info or {}
-            }
-            
-            violation = ViolationService.log_window_blur_violation(
-                db=db,
-                session_id=session_id,
-                filepath=screenshot_path
+            violation = ViolationService.log_violation(
+                db,
+                session_id,
+                _VIOLATION_TYPE,
+                WindowBlurService._violation_details(duration_seconds, additional_info),
+                screenshot_path
             )
             
             if violation:
-                logger.warning(f"Window blur violation logged for session {session_id}: duration={duration_seconds}s")
+                _invalidate_cached_reads(session_id)
+                logger.warning("Window blur violation logged for session %s: duration=%ss", session_id, duration_seconds)
                 return True
             else:
-                logger.error(f"Failed to log window blur violation for session {session_id}")
+                logger.error("Failed to log window blur violation for session %s", session_id)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error logging window blur violation: {str(e)}")
+            logger.error("Error logging window blur violation: %s", e)
             return False
     
     @staticmethod
     def get_session_violations(db: Session, session_id: int) -> List[Dict[str, Any]]:
         """Get all window blur violations for a session"""
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'window_blur'
-                )
-            ).order_by(Violation.timestamp.desc()).all()
-            
-            return [
-                {
-                    "id": violation.id,
-                    "session_id": violation.session_id,
-                    "timestamp": violation.timestamp,
-                    "details": violation.details,
-                    "filepath": violation.filepath
-                } for violation in violations
-            ]
+            return ViolationService.list_session_violations(db, session_id, _VIOLATION_TYPE)
         except Exception as e:
-            logger.error(f"Error getting session window blur violations: {str(e)}")
+            logger.error("Error getting session window blur violations: %s", e)
             return []
     
     @staticmethod
-    def get_window_blur_status(db: Session, session_id: int) -> Dict[str, Any]:
+    def get_window_blur_status(db: Session, session_id: int) -> WindowBlurStatus:
         """Get the current window blur status for a session"""
+        with _cache_lock:
+            cached = _status_cache.get(session_id)
+        if cached is not None:
+            return cached
+        
         try:
-            from app.models.violation import Violation
-            
-            # Get the most recent violation
-            latest_violation = db.query(Violation).filter(
+            # Get the most recent violation time and the total count in one round trip
+            last_violation, total_violations = db.query(
+                func.max(Violation.timestamp),
+                func.count(Violation.id)
+            ).filter(
                 and_(
                     Violation.session_id == session_id,
-                    Violation.violation_type == 'window_blur'
+                    Violation.violation_type == literal(_VIOLATION_TYPE, literal_execute=True)
                 )
-            ).order_by(Violation.timestamp.desc()).first()
+            ).one()
             
-            # Count total violations
-            total_violations = db.query(Violation).filter(
-                and_(
-                    Violation.session_id == session_id,
-                    Violation.violation_type == 'window_blur'
-                )
-            ).count()
-            
-            return {
-                "session_id": session_id,
-                "is_focused": latest_violation is None,  # Focused if no recent violations
-                "last_violation": latest_violation.timestamp if latest_violation else None,
-                "total_violations": total_violations
-            }
+            status = WindowBlurStatus(
+                session_id,
+                total_violations == 0,  # Focused if no recent violations
+                last_violation,
+                total_violations
+            )
+            with _cache_lock:
+                _status_cache[session_id] = status
+            return status
         except Exception as e:
-            logger.error(f"Error getting window blur status: {str(e)}")
-            return {
-                "session_id": session_id,
-                "is_focused": True,
-                "last_violation": None,
-                "total_violations": 0,
-                "error": str(e)
-            }
+            logger.error("Error getting window blur status: %s", e)
+            return WindowBlurStatus(session_id, True, None, 0, error=str(e))
     
     @staticmethod
-    def get_violation_summary(db: Session, session_id: int) -> Dict[str, Any]:
+    def get_violation_summary(db: Session, session_id: int) -> WindowBlurSummary:
         """Get a summary of window blur violations for a session"""
+        with _cache_lock:
+            cached = _summary_cache.get(session_id)
+        if cached is not None:
+            return cached
+        
         try:
-            from app.models.violation import Violation
-            
-            violations = db.query(Violation).filter(
+            # Aggregate in the database instead of loading every violation
+            total_violations, total_duration, last_violation = db.query(
+                func.count(Violation.id),
+                func.coalesce(func.sum(Violation.details['duration_seconds'].as_float()), 0),
+                func.max(Violation.timestamp)
+            ).filter(
                 and_(
                     Violation.session_id == session_id,
-                    Violation.violation_type == 'window_blur'
+                    Violation.violation_type == literal(_VIOLATION_TYPE, literal_execute=True)
                 )
-            ).all()
-            
-            if not violations:
-                return {
-                    "session_id": session_id,
-                    "total_violations": 0,
-                    "average_duration": 0,
-                    "total_time_blurred": 0,
-                    "last_violation": None
-                }
+            ).one()
             
-            total_violations = len(violations)
-            total_duration = sum(v.details.get('duration_seconds', 0) for v in violations if v.details)
-            average_duration = total_duration / total_violations if total_violations > 0 else 0
-            last_violation = max(violations, key=lambda x: x.timestamp).timestamp
+            if not total_violations:
+                summary = WindowBlurSummary(session_id, 0, 0, 0, None)
+            else:
+                average_duration = total_duration / total_violations
+                summary = WindowBlurSummary(
+                    session_id,
+                    total_violations,
+                    round(average_duration, 2),
+                    total_duration,
+                    last_violation
+                )
             
-            return {
-                "session_id": session_id,
-                "total_violations": total_violations,
-                "average_duration": round(average_duration, 2),
-                "total_time_blurred": total_duration,
-                "last_violation": last_violation
-            }
+            with _cache_lock:
+                _summary_cache[session_id] = summary
+            return summary
         except Exception as e:
-            logger.error(f"Error getting window blur summary: {str(e)}")
-            return {
-                "session_id": session_id,
-                "total_violations": 0,
-                "average_duration": 0,
-                "total_time_blurred": 0,
-                "last_violation": None,
-                "error": str(e)
-            } 
\ No newline at end of file
+            logger.error("Error getting window blur summary: %s", e)
+            return WindowBlurSummary(session_id, 0, 0, 0, None, error=str(e)) 
\ No newline at end of file
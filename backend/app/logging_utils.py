@@ -1,8 +1,14 @@
+import atexit
+import itertools
 import logging
+import mmap
 import os
-import json
+import orjson
+import queue
+import sqlite3
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 import time
 import uuid
 
@@ -40,7 +46,237 @@ if not os.path.exists(monitoring_logs_dir):
     except Exception as e:
         logger.error(f"Failed to create monitoring logs directory: {str(e)}")
 
-def log_event(event_type, session_id=None, test_id=None, user_id=None, data=None, severity="info"):
+# Monitoring events are appended by a background thread so request handlers never
+# wait on file I/O. The writer collects lines and appends them with one vectored
+# write once this many are pending or the oldest has waited this long.
+# LOG_BATCH=0 writes every event as soon as it arrives, for debugging.
+_EVENT_FLUSH_EVERY = 100 if os.getenv("LOG_BATCH", "1") != "0" else 1
+_EVENT_FLUSH_INTERVAL = 0.5
+
+_event_queue = queue.SimpleQueue()
+_STOP_WRITER = object()
+
+# Sidecar index of where each session's events sit in the JSONL files, so session
+# lookups read just those lines instead of scanning every file. Files listed in
+# indexed_files are fully covered; anything older is still scanned.
+_LOG_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    session_id TEXT NOT NULL,
+    unix_ts INTEGER NOT NULL,
+    event_type TEXT,
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    len INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_events_session_ts ON events (session_id, unix_ts DESC);
+CREATE TABLE IF NOT EXISTS indexed_files (file TEXT PRIMARY KEY);
+"""
+_INSERT_INDEX_ROWS = "INSERT INTO events (session_id, unix_ts, event_type, file, offset, len) VALUES (?, ?, ?, ?, ?, ?)"
+
+# Newest-first listing of the daily log files, rebuilt only when the directory's
+# mtime shows a file was added or removed
+_EVENT_LOG_SUFFIX = '_events.jsonl'
+_log_listing = {"mtime_ns": None, "files": []}
+_log_listing_lock = threading.Lock()
+
+# Event payloads come from many callers and may use non-string keys
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def _monitoring_log_path(day):
+    """Path of the monitoring log file for a YYYY-MM-DD day"""
+    return os.path.join(monitoring_logs_dir, f"{day}{_EVENT_LOG_SUFFIX}")
+
+def _session_key(session_id):
+    """Session ID as it appears in the serialized events"""
+    return orjson.dumps(session_id).decode()
+
+def _open_log_index():
+    """Open the sidecar index, creating its tables on first use"""
+    conn = sqlite3.connect(os.path.join(monitoring_logs_dir, 'index.sqlite'), timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_LOG_INDEX_SCHEMA)
+    return conn
+
+def _index_existing_lines(conn, path, name):
+    """Index the lines already in a log file the writer is about to take over"""
+    rows = []
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                event = orjson.loads(line)
+                if event.get('session_id') is not None:
+                    rows.append((
+                        _session_key(event['session_id']),
+                        event.get('unix_timestamp', 0),
+                        event.get('event_type'),
+                        name,
+                        offset,
+                        len(line)
+                    ))
+            except orjson.JSONDecodeError:
+                pass
+            offset += len(line)
+    conn.executemany(_INSERT_INDEX_ROWS, rows)
+
+def _append_lines(fd, lines):
+    """Append lines to a file descriptor in a single system call where possible"""
+    if hasattr(os, "writev"):
+        written = os.writev(fd, lines)
+    else:
+        # Windows has no writev; one joined write is still a single call
+        written = os.write(fd, b"".join(lines))
+    total = sum(len(line) for line in lines)
+    if written < total:
+        os.write(fd, b"".join(lines)[written:])
+
+def _event_writer():
+    """Append queued events to the daily monitoring log, reopening on date change"""
+    conn = None
+    current_day = None
+    current_name = None
+    fd = None
+    pending_lines = []
+    pending_size = 0
+    pending_index = []
+    oldest_pending = 0.0
+    # Whether events appended to the current file are being indexed
+    current_indexed = False
+    # Files whose appended lines are missing from the index but are still listed
+    # in indexed_files; they are delisted as soon as the index accepts the write
+    unindexed_files = set()
+    
+    def delist_unindexed():
+        """Remove files with missing index rows from indexed_files so lookups scan them"""
+        if not unindexed_files:
+            return
+        try:
+            conn.executemany("DELETE FROM indexed_files WHERE file = ?", [(name,) for name in unindexed_files])
+            conn.commit()
+            unindexed_files.clear()
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"ERROR: Failed to delist unindexed monitoring logs: {str(e)}", file=sys.stderr)
+    
+    def flush():
+        nonlocal pending_size, current_indexed
+        base = os.fstat(fd).st_size
+        _append_lines(fd, pending_lines)
+        pending_lines.clear()
+        pending_size = 0
+        if pending_index:
+            try:
+                conn.executemany(
+                    _INSERT_INDEX_ROWS,
+                    [(key, ts, etype, name, base + offset, length) for key, ts, etype, name, offset, length in pending_index]
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                # The lines are already on disk, so fall back to scanning the file
+                # rather than leaving its events invisible to session lookups
+                conn.rollback()
+                print(f"ERROR: Failed to index monitoring events: {str(e)}", file=sys.stderr)
+                unindexed_files.update(row[3] for row in pending_index)
+                current_indexed = False
+            pending_index.clear()
+        delist_unindexed()
+    
+    while True:
+        try:
+            item = _event_queue.get(timeout=_EVENT_FLUSH_INTERVAL)
+        except queue.Empty:
+            item = None
+        
+        try:
+            if conn is None:
+                conn = _open_log_index()
+            delist_unindexed()
+            
+            if item is None or item is _STOP_WRITER:
+                if pending_lines:
+                    flush()
+                if item is _STOP_WRITER:
+                    break
+                continue
+            
+            day, line, session_key, unix_ts, event_type = item
+            if day != current_day:
+                if fd is not None:
+                    if pending_lines:
+                        flush()
+                    os.close(fd)
+                    fd = None
+                path = _monitoring_log_path(day)
+                name = os.path.basename(path)
+                if conn.execute("SELECT 1 FROM indexed_files WHERE file = ?", (name,)).fetchone() is None:
+                    # Rebuild the file's index from scratch, dropping rows left by an
+                    # earlier partial indexing
+                    conn.execute("DELETE FROM events WHERE file = ?", (name,))
+                    if os.path.exists(path):
+                        _index_existing_lines(conn, path, name)
+                    conn.execute("INSERT INTO indexed_files (file) VALUES (?)", (name,))
+                    conn.commit()
+                current_indexed = True
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+                current_day = day
+                current_name = name
+            
+            if not pending_lines:
+                oldest_pending = time.monotonic()
+            if session_key is not None and current_indexed:
+                pending_index.append((session_key, unix_ts, event_type, current_name, pending_size, len(line)))
+            pending_lines.append(line)
+            pending_size += len(line)
+            if (len(pending_lines) >= _EVENT_FLUSH_EVERY
+                    or time.monotonic() - oldest_pending >= _EVENT_FLUSH_INTERVAL):
+                flush()
+        except Exception as e:
+            print(f"ERROR: Failed to write monitoring event: {str(e)}", file=sys.stderr)
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            if conn is not None:
+                conn.close()
+            conn = None
+            fd = None
+            current_day = None
+            pending_lines.clear()
+            pending_size = 0
+            pending_index.clear()
+            if item is _STOP_WRITER:
+                break
+    
+    if fd is not None:
+        os.close(fd)
+    if conn is not None:
+        conn.close()
+
+_event_writer_thread = threading.Thread(target=_event_writer, name="monitoring-event-writer", daemon=True)
+_event_writer_thread.start()
+
+@atexit.register
+def _flush_and_close():
+    """Drain queued events to disk before the interpreter exits"""
+    _event_queue.put(_STOP_WRITER)
+    _event_writer_thread.join(timeout=5)
+
+# Event IDs only need to be unique across this deployment's log files, so they are
+# built from the process start time, its pid and a counter rather than uuid4, which
+# reads os.urandom on every call
+_event_id_prefix = f"{int(time.time()):x}-{os.getpid():x}-"
+_event_counter = itertools.count()
+
+# Log level for each event severity; anything unrecognised logs at info
+_SEVERITY_LEVELS = {
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL
+}
+
+def log_event(event_type, session_id=None, test_id=None, user_id=None, data=None, severity="info", use_uuid=False):
     """
     Log an event to the monitoring logs
     
@@ -51,16 +287,19 @@ def log_event(event_type, session_id=None, test_id=None, user_id=None, data=None
         user_id (str or int, optional): User ID
         data (dict, optional): Additional data to log
         severity (str, optional): Event severity (info, warning, error, critical)
+        use_uuid (bool, optional): Give the event a random UUID instead of the
+            process-local sequential ID, for consumers that dedupe across systems
     
     Returns:
         dict: The logged event data with metadata
     """
     try:
-        # Create event object
+        # Create event object; both timestamps come from the same clock reading
+        now = time.time()
         event = {
-            "id": str(uuid.uuid4()),
-            "timestamp": datetime.utcnow().isoformat(),
-            "unix_timestamp": int(time.time()),
+            "id": str(uuid.uuid4()) if use_uuid else f"{_event_id_prefix}{next(_event_counter):x}",
+            "timestamp": datetime.utcfromtimestamp(now).isoformat(),
+            "unix_timestamp": int(now),
             "event_type": event_type,
             "severity": severity
         }
@@ -75,23 +314,26 @@ def log_event(event_type, session_id=None, test_id=None, user_id=None, data=None
         if data:
             event["data"] = data
             
+        # The payload is serialized once; the bytes are embedded in the file line
+        # below and only decoded for the log message if that level is enabled
+        data_json = orjson.dumps(data or {}, option=_ORJSON_OPTIONS)
+        
         # Log to appropriate logger based on severity
-        log_message = f"{event_type}: {json.dumps(data or {})}"
-        if severity == "warning":
-            logger.warning(log_message)
-        elif severity == "error":
-            logger.error(log_message)
-        elif severity == "critical":
-            logger.critical(log_message)
-        else:
-            logger.info(log_message)
+        level = _SEVERITY_LEVELS.get(severity, logging.INFO)
+        if logger.isEnabledFor(level):
+            logger.log(level, "%s: %s", event_type, data_json.decode())
             
-        # Write to monitoring log file
-        filename = f"{datetime.utcnow().strftime('%Y-%m-%d')}_events.jsonl"
-        filepath = os.path.join(monitoring_logs_dir, filename)
-        
-        with open(filepath, 'a') as f:
-            f.write(json.dumps(event) + '\n')
+        # Hand the line to the writer thread for the monitoring log file
+        _event_queue.put((
+            event["timestamp"][:10],
+            orjson.dumps(
+                {**event, "data": orjson.Fragment(data_json)} if data else event,
+                option=_ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+            ),
+            _session_key(session_id) if session_id else None,
+            event["unix_timestamp"],
+            event_type
+        ))
             
         return event
         
@@ -105,7 +347,74 @@ def log_event(event_type, session_id=None, test_id=None, user_id=None, data=None
             "event_type": event_type
         }
 
-def get_session_logs(session_id, limit=100, event_type=None):
+def _list_monitoring_log_files():
+    """Names of the daily monitoring log files, newest first"""
+    mtime_ns = os.stat(monitoring_logs_dir).st_mtime_ns
+    with _log_listing_lock:
+        if _log_listing["mtime_ns"] == mtime_ns:
+            return _log_listing["files"]
+    
+    files = sorted((f for f in os.listdir(monitoring_logs_dir) if f.endswith(_EVENT_LOG_SUFFIX)), reverse=True)
+    with _log_listing_lock:
+        _log_listing["mtime_ns"] = mtime_ns
+        _log_listing["files"] = files
+    return files
+
+def _read_indexed_events(session_id, limit, event_type=None, since_ts=None):
+    """
+    Read a session's newest events through the sidecar index
+    
+    Returns:
+        tuple: (events found, names of the log files the index fully covers)
+    """
+    index_path = os.path.join(monitoring_logs_dir, 'index.sqlite')
+    if not os.path.exists(index_path):
+        return [], set()
+    
+    try:
+        conn = sqlite3.connect(index_path, timeout=10)
+        try:
+            indexed_files = {row[0] for row in conn.execute("SELECT file FROM indexed_files")}
+            # Rows of files dropped from indexed_files are incomplete; those files are scanned instead
+            sql = "SELECT file, offset, len FROM events WHERE session_id = ? AND file IN (SELECT file FROM indexed_files)"
+            params = [_session_key(session_id)]
+            if event_type is not None:
+                sql += " AND event_type = ?"
+                params.append(event_type)
+            if since_ts is not None:
+                sql += " AND unix_ts >= ?"
+                params.append(since_ts)
+            sql += " ORDER BY unix_ts DESC LIMIT ?"
+            params.append(limit)
+            locations = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading monitoring log index: {str(e)}")
+        return [], set()
+    
+    by_file = {}
+    for name, offset, length in locations:
+        by_file.setdefault(name, []).append((offset, length))
+    
+    events = []
+    for name, entries in by_file.items():
+        try:
+            with open(os.path.join(monitoring_logs_dir, name), 'rb') as f:
+                for offset, length in entries:
+                    f.seek(offset)
+                    try:
+                        event = orjson.loads(f.read(length))
+                    except orjson.JSONDecodeError:
+                        continue
+                    if event.get('session_id') == session_id:
+                        events.append(event)
+        except OSError as e:
+            logger.error(f"Error reading log file {name}: {str(e)}")
+    
+    return events, indexed_files
+
+def get_session_logs(session_id, limit=100, event_type=None, since=None):
     """
     Retrieve logs for a specific session
     
@@ -113,19 +422,30 @@ def get_session_logs(session_id, limit=100, event_type=None):
         session_id (str): The session ID to filter logs for
         limit (int, optional): Maximum number of logs to return
         event_type (str, optional): Filter by event type
+        since (datetime, optional): Only return events at or after this time;
+            naive values are taken as UTC, like the log file dates
         
     Returns:
         list: List of log events for the session
     """
     try:
-        session_logs = []
+        since_ts = since_day = None
+        if since is not None:
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            since_ts = int(since.timestamp())
+            since_day = since.astimezone(timezone.utc).strftime('%Y-%m-%d')
+        
+        # Events in files the writer has indexed are read directly by offset
+        session_logs, indexed_files = _read_indexed_events(session_id, limit, event_type, since_ts)
         
-        # Get all log files
-        log_files = [os.path.join(monitoring_logs_dir, f) for f in os.listdir(monitoring_logs_dir)
-                    if f.endswith('_events.jsonl')]
+        # Older, unindexed log files are still scanned newest first, skipping days before `since`
+        log_files = [os.path.join(monitoring_logs_dir, f) for f in _list_monitoring_log_files()
+                    if f not in indexed_files and (since_day is None or f[:10] >= since_day)]
         
-        # Sort by date (newest first)
-        log_files.sort(reverse=True)
+        # The session ID as it appears in the serialized events; lines without it
+        # cannot match, so they are skipped without being decoded or parsed
+        session_needle = _session_key(session_id).encode()
         
         # Process log files until we have enough events
         for log_file in log_files:
@@ -133,17 +453,33 @@ def get_session_logs(session_id, limit=100, event_type=None):
                 break
                 
             try:
-                with open(log_file, 'r') as f:
-                    for line in f:
-                        try:
-                            event = json.loads(line.strip())
-                            if event.get('session_id') == session_id:
-                                if event_type is None or event.get('event_type') == event_type:
-                                    session_logs.append(event)
-                                    if len(session_logs) >= limit:
-                                        break
-                        except json.JSONDecodeError:
-                            continue
+                with open(log_file, 'rb') as f:
+                    try:
+                        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    except ValueError:
+                        # Empty files cannot be mapped
+                        continue
+                    with mm:
+                        # Jump from one occurrence of the session ID to the next and
+                        # copy out only the lines containing it
+                        pos = mm.find(session_needle)
+                        while pos != -1:
+                            start = mm.rfind(b"\n", 0, pos) + 1
+                            end = mm.find(b"\n", pos)
+                            if end == -1:
+                                end = len(mm)
+                            pos = mm.find(session_needle, end)
+                            try:
+                                event = orjson.loads(mm[start:end])
+                                if event.get('session_id') == session_id:
+                                    if since_ts is not None and event.get('unix_timestamp', 0) < since_ts:
+                                        continue
+                                    if event_type is None or event.get('event_type') == event_type:
+                                        session_logs.append(event)
+                                        if len(session_logs) >= limit:
+                                            break
+                            except orjson.JSONDecodeError:
+                                continue
             except Exception as e:
                 logger.error(f"Error reading log file {log_file}: {str(e)}")
                 
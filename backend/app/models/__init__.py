@@ -3,6 +3,7 @@
 
 # Base models without foreign key dependencies
 from app.models.user import User
+from app.models.session_daily_rollup import SessionDailyRollup
 
 # Models with foreign keys to base models
 from app.models.test import Test
@@ -32,6 +33,7 @@ __all__ = [
     'FaceVerification',
     'Question',
     'TestSession',
+    'SessionDailyRollup',
     'Option',
     'Violation',
     'ScreenCapture',
@@ -13,7 +13,9 @@ class Question(Base):
 
     # Define relationships
     test = relationship("Test", back_populates="questions")
-    options = relationship("Option", back_populates="question", cascade="all, delete-orphan")
+    # Options are read with every question, so they are loaded for a whole batch of
+    # questions in one SELECT ... WHERE question_id IN (...) instead of one per question
+    options = relationship("Option", back_populates="question", cascade="all, delete-orphan", lazy="selectin")
     user_responses = relationship("UserResponse", back_populates="question")
 
     def __repr__(self):
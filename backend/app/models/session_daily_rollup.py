@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Date, Float
+from app.database import Base
+
+class SessionDailyRollup(Base):
+    """Completed test session totals per test, user and end_time day
+
+    Maintained by TestSessionService as sessions are completed or deleted, so the
+    analytics endpoints sum a few rollup rows instead of scanning test_sessions.
+    """
+    __tablename__ = "session_daily_rollup"
+
+    test_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    completed_count = Column(Integer, nullable=False, default=0)
+    sum_pct = Column(Float, nullable=False, default=0)  # NULL percentages count as 0
+    sum_pct_sq = Column(Float, nullable=False, default=0)  # For the score variance
+    # Score distribution of completed sessions that have a percentage
+    bucket_0_20 = Column(Integer, nullable=False, default=0)
+    bucket_21_40 = Column(Integer, nullable=False, default=0)
+    bucket_41_60 = Column(Integer, nullable=False, default=0)
+    bucket_61_80 = Column(Integer, nullable=False, default=0)
+    bucket_81_100 = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SessionDailyRollup(test_id={self.test_id}, user_id={self.user_id}, day={self.day}, completed_count={self.completed_count})>"
\ No newline at end of file
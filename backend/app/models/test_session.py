@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -28,4 +28,12 @@ class TestSession(Base):
     proctor_permission_logs = relationship("ProctorPermissionLog", back_populates="exam_session", cascade="all, delete-orphan")
 
     def __repr__(self):
-        return f"<TestSession(id={self.id}, test_id={self.test_id}, user_id={self.user_id}, status={self.status})>" 
\ No newline at end of file
+        return f"<TestSession(id={self.id}, test_id={self.test_id}, user_id={self.user_id}, status={self.status})>"
+
+# Cover the per-user and per-test session lookups and counts (analytics, session
+# lists), including the ones that also filter on status
+Index('ix_sess_user_status', TestSession.user_id, TestSession.status)
+Index('ix_sess_test_status', TestSession.test_id, TestSession.status)
+
+# Covers completed-session reads over an end_time range
+Index('ix_sess_end_status', TestSession.end_time, TestSession.status)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -16,4 +16,35 @@ class Violation(Base):
     session = relationship("TestSession", back_populates="violations")
 
     def __repr__(self):
-        return f"<Violation(id={self.id}, session_id={self.session_id}, violation_type={self.violation_type})>" 
\ No newline at end of file
+        return f"<Violation(id={self.id}, session_id={self.session_id}, violation_type={self.violation_type})>" 
+
+# Covers the per-session, per-type violation lookups, which filter on session_id
+# and violation_type and read the newest rows first. The status aggregates
+# (MAX(timestamp), COUNT(id)) are answered from this index alone, since the
+# clustered primary key is carried in every index row.
+Index(
+    'ix_violation_session_type_ts',
+    Violation.session_id,
+    Violation.violation_type,
+    Violation.timestamp.desc()
+)
+
+# Covers the session-wide timeline reads (summaries, reports, analytics), which
+# filter on session_id alone and order by timestamp
+Index(
+    'ix_violation_session_ts',
+    Violation.session_id,
+    Violation.timestamp
+)
+
+# Window blur events are polled per session far more often than any other type, so
+# they get a filtered index covering only their rows. SQL Server only matches a
+# filtered index against a literal predicate, which is why WindowBlurService
+# renders its violation_type filter inline instead of as a bound parameter.
+Index(
+    'ix_violation_window_blur_session_ts',
+    Violation.session_id,
+    Violation.timestamp.desc(),
+    mssql_where=Violation.violation_type == 'window_blur',
+    sqlite_where=Violation.violation_type == 'window_blur'
+)
\ No newline at end of file
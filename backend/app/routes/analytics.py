@@ -1,106 +1,157 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 import logging
 from ..database import get_db
-from ..services.test_session_service import TestSessionService
 from ..services.proctoring_service import ProctoringService
 from sqlalchemy import func
 from ..models.test_session import TestSession
+from ..models.session_daily_rollup import SessionDailyRollup
 from ..models.violation import Violation
 from datetime import datetime, timedelta
+from cachetools import TTLCache
+import threading
 
 # Set up logging with reduced verbosity
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 
+# Dashboards request the same aggregates on every visit, so results are kept for
+# two minutes keyed on (endpoint, params). Pass ?nocache=1 to recompute.
+_analytics_cache = TTLCache(maxsize=1024, ttl=120)
+_analytics_cache_lock = threading.Lock()
+
+# /performance windows end at the current time rounded down to this many minutes,
+# so requests within the same interval share a cache key
+_PERFORMANCE_WINDOW_MINUTES = 5
+
+
+def _get_cached(key: tuple, nocache: bool, response: Response):
+    """Return the cached result for key, marking the response as a cache hit"""
+    if nocache:
+        return None
+    with _analytics_cache_lock:
+        cached = _analytics_cache.get(key)
+    if cached is not None:
+        response.headers["X-Cache"] = "HIT"
+    return cached
+
+
+def _store_cached(key: tuple, result: Dict[str, Any], nocache: bool, response: Response) -> Dict[str, Any]:
+    """Cache a freshly computed result and mark the response as a miss or bypass"""
+    with _analytics_cache_lock:
+        _analytics_cache[key] = result
+    response.headers["X-Cache"] = "BYPASS" if nocache else "MISS"
+    return result
+
 @router.get("/user/{user_id}")
-async def get_user_analytics(user_id: int, db: Session = Depends(get_db)):
+async def get_user_analytics(
+    user_id: int,
+    response: Response,
+    nocache: bool = False,
+    db: Session = Depends(get_db)
+):
     """Get analytics for a specific user"""
+    cache_key = ("user", user_id)
+    cached = _get_cached(cache_key, nocache, response)
+    if cached is not None:
+        return cached
+    
     try:
-        # Get all sessions for this user
-        user_sessions = TestSessionService.get_sessions_by_user(db, user_id)
-        
-        # Calculate metrics
-        total_sessions = len(user_sessions)
-        completed_sessions = len([s for s in user_sessions if s.status == "completed"])
-        average_score = sum([s.percentage or 0 for s in user_sessions if s.status == "completed"]) / completed_sessions if completed_sessions > 0 else 0
+        # Completed sessions and their scores come from the daily rollup, only the
+        # overall session count needs test_sessions
+        total_sessions = db.query(func.count(TestSession.id)).filter(
+            TestSession.user_id == user_id
+        ).scalar()
+        completed_sessions, completed_score_total = db.query(
+            func.sum(SessionDailyRollup.completed_count),
+            func.sum(SessionDailyRollup.sum_pct)
+        ).filter(SessionDailyRollup.user_id == user_id).one()
         
-        # Get violations for this user's sessions
-        violations = []
-        for session in user_sessions:
-            session_violations = ProctoringService.get_session_violations(db, session.id)
-            violations.extend(session_violations)
+        completed_sessions = completed_sessions or 0
+        average_score = completed_score_total / completed_sessions if completed_sessions > 0 else 0
         
-        # Count violation types
-        violation_types = {}
-        for v in violations:
-            if v.violation_type in violation_types:
-                violation_types[v.violation_type] += 1
-            else:
-                violation_types[v.violation_type] = 1
+        # Count this user's violations by type in one grouped query
+        violation_types = ProctoringService.get_violation_type_counts_for_user(db, user_id)
                 
-        return {
+        return _store_cached(cache_key, {
             "user_id": user_id,
             "total_sessions": total_sessions,
             "completed_sessions": completed_sessions,
             "average_score": average_score,
-            "violation_count": len(violations),
+            "violation_count": sum(violation_types.values()),
             "violation_types": violation_types
-        }
+        }, nocache, response)
     except Exception as e:
         logger.error(f"Error getting user analytics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/test/{test_id}")
-async def get_test_analytics(test_id: int, db: Session = Depends(get_db)):
+async def get_test_analytics(
+    test_id: int,
+    response: Response,
+    nocache: bool = False,
+    db: Session = Depends(get_db)
+):
     """Get analytics for a specific test"""
+    cache_key = ("test", test_id)
+    cached = _get_cached(cache_key, nocache, response)
+    if cached is not None:
+        return cached
+    
     try:
-        # Get all sessions for this test
-        test_sessions = TestSessionService.get_sessions_by_test(db, test_id)
+        # Completed sessions, their scores and the score distribution come from the
+        # daily rollup, only the overall session count needs test_sessions
+        total_sessions = db.query(func.count(TestSession.id)).filter(
+            TestSession.test_id == test_id
+        ).scalar()
+        (
+            completed_sessions,
+            completed_score_total,
+            *bucket_counts
+        ) = db.query(
+            func.sum(SessionDailyRollup.completed_count),
+            func.sum(SessionDailyRollup.sum_pct),
+            func.sum(SessionDailyRollup.bucket_0_20),
+            func.sum(SessionDailyRollup.bucket_21_40),
+            func.sum(SessionDailyRollup.bucket_41_60),
+            func.sum(SessionDailyRollup.bucket_61_80),
+            func.sum(SessionDailyRollup.bucket_81_100)
+        ).filter(SessionDailyRollup.test_id == test_id).one()
         
-        # Calculate metrics
-        total_sessions = len(test_sessions)
-        completed_sessions = len([s for s in test_sessions if s.status == "completed"])
-        average_score = sum([s.percentage or 0 for s in test_sessions if s.status == "completed"]) / completed_sessions if completed_sessions > 0 else 0
+        completed_sessions = completed_sessions or 0
+        average_score = completed_score_total / completed_sessions if completed_sessions > 0 else 0
         
         # Calculate score distribution
-        score_ranges = {
-            "0-20": 0,
-            "21-40": 0,
-            "41-60": 0,
-            "61-80": 0,
-            "81-100": 0
-        }
+        score_ranges = dict(zip(
+            ("0-20", "21-40", "41-60", "61-80", "81-100"),
+            (count or 0 for count in bucket_counts)
+        ))
         
-        for session in test_sessions:
-            if session.status == "completed" and session.percentage is not None:
-                if session.percentage <= 20:
-                    score_ranges["0-20"] += 1
-                elif session.percentage <= 40:
-                    score_ranges["21-40"] += 1
-                elif session.percentage <= 60:
-                    score_ranges["41-60"] += 1
-                elif session.percentage <= 80:
-                    score_ranges["61-80"] += 1
-                else:
-                    score_ranges["81-100"] += 1
-        
-        return {
+        return _store_cached(cache_key, {
             "test_id": test_id,
             "total_sessions": total_sessions,
             "completed_sessions": completed_sessions,
             "average_score": average_score,
             "score_distribution": score_ranges
-        }
+        }, nocache, response)
     except Exception as e:
         logger.error(f"Error getting test analytics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/violations")
-async def get_violation_statistics(db: Session = Depends(get_db)):
+async def get_violation_statistics(
+    response: Response,
+    nocache: bool = False,
+    db: Session = Depends(get_db)
+):
     """Get violation statistics"""
+    cache_key = ("violations",)
+    cached = _get_cached(cache_key, nocache, response)
+    if cached is not None:
+        return cached
+    
     try:
         # Count total violations
         total_violations = db.query(func.count(Violation.id)).scalar()
@@ -114,23 +165,30 @@ async def get_violation_statistics(db: Session = Depends(get_db)):
         # Format the results
         violation_types = {v_type: count for v_type, count in violations_by_type}
         
-        return {
+        return _store_cached(cache_key, {
             "total_violations": total_violations,
             "violations_by_type": violation_types
-        }
+        }, nocache, response)
     except Exception as e:
         logger.error(f"Error getting violation statistics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/performance")
 async def get_performance_statistics(
+    response: Response,
     period: str = "week",  # week, month, year
+    nocache: bool = False,
     db: Session = Depends(get_db)
 ):
     """Get performance statistics"""
     try:
-        # Determine the date range
+        # Determine the date range, ending on an interval boundary so it can be cached
         now = datetime.utcnow()
+        now = now.replace(
+            minute=now.minute - now.minute % _PERFORMANCE_WINDOW_MINUTES,
+            second=0,
+            microsecond=0
+        )
         if period == "week":
             start_date = now - timedelta(days=7)
         elif period == "month":
@@ -140,31 +198,34 @@ async def get_performance_statistics(
         else:
             raise HTTPException(status_code=400, detail="Invalid period. Use 'week', 'month', or 'year'.")
         
-        # Get completed sessions in the date range
-        completed_sessions = db.query(TestSession).filter(
-            TestSession.status == "completed",
-            TestSession.end_time >= start_date,
-            TestSession.end_time <= now
-        ).all()
+        cache_key = ("performance", period, now)
+        cached = _get_cached(cache_key, nocache, response)
+        if cached is not None:
+            return cached
         
-        # Calculate average score
-        average_score = sum([s.percentage or 0 for s in completed_sessions]) / len(completed_sessions) if completed_sessions else 0
+        # Count and total the scores of completed sessions per day from the daily
+        # rollup. The window covers whole days, including all of start_date's.
+        daily_rows = db.query(
+            SessionDailyRollup.day,
+            func.sum(SessionDailyRollup.completed_count),
+            func.sum(SessionDailyRollup.sum_pct)
+        ).filter(
+            SessionDailyRollup.day >= start_date.date(),
+            SessionDailyRollup.day <= now.date()
+        ).group_by(SessionDailyRollup.day).order_by(SessionDailyRollup.day).all()
         
-        # Count sessions by day
-        sessions_by_day = {}
-        for session in completed_sessions:
-            day = session.end_time.strftime("%Y-%m-%d")
-            if day in sessions_by_day:
-                sessions_by_day[day] += 1
-            else:
-                sessions_by_day[day] = 1
+        sessions_by_day = {str(session_day): count for session_day, count, _ in daily_rows}
+        completed_count = sum(sessions_by_day.values())
+        
+        # Calculate average score
+        average_score = sum(score_total for _, _, score_total in daily_rows) / completed_count if completed_count else 0
         
-        return {
+        return _store_cached(cache_key, {
             "period": period,
-            "completed_sessions": len(completed_sessions),
+            "completed_sessions": completed_count,
             "average_score": average_score,
             "sessions_by_day": sessions_by_day
-        }
+        }, nocache, response)
     except HTTPException:
         raise
     except Exception as e:
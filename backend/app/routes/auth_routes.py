@@ -10,8 +10,13 @@ from ..utils.error_handlers import (
 from ..utils.auth import validate_session, require_auth, require_role
 from descope import DescopeClient
 import os
+import asyncio
 import logging
 import json
+import threading
+import time
+import hashlib
+from cachetools import TTLCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +29,35 @@ face_auth_service = FaceAuthService()
 DESCOPE_PROJECT_ID = os.getenv("DESCOPE_PROJECT_ID", "P2x56iiJWdwCEbUDl6ikvPeq5tfX")  # Replace with your Project ID
 descope_client = DescopeClient(project_id=DESCOPE_PROJECT_ID)
 
+# The frontend validates the same bearer token on several calls in quick
+# succession, so Descope's answer is kept for up to 30 seconds per token (keyed
+# on a hash, never the raw token) and never past the session's own expiry
+_validated_sessions = TTLCache(maxsize=10_000, ttl=30)
+_validated_sessions_lock = threading.Lock()
+
+def _session_expiry(validation_response):
+    """Unix expiry time of a validated session, or None if Descope didn't send one"""
+    exp = validation_response.get("exp")
+    if exp is None:
+        exp = (validation_response.get("sessionToken") or {}).get("exp")
+    return exp
+
+def validate_descope_session(token):
+    """Validate a session token with Descope, reusing a recent successful result"""
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _validated_sessions_lock:
+        cached = _validated_sessions.get(key)
+    if cached is not None:
+        expires_at, validation_response = cached
+        if expires_at is None or expires_at > time.time():
+            return validation_response
+    
+    # Raises if the session is invalid or expired, failures are never cached
+    validation_response = descope_client.validate_session(token)
+    with _validated_sessions_lock:
+        _validated_sessions[key] = (_session_expiry(validation_response), validation_response)
+    return validation_response
+
 # Simple file-based storage for user roles
 ROLES_FILE = "user_roles.json"
 
@@ -41,11 +75,33 @@ def load_user_roles():
 def save_user_roles(user_roles):
     """Save user roles to file"""
     try:
-        with open(ROLES_FILE, 'w') as f:
+        # Write a temporary file and swap it in, so a crash or a concurrent
+        # reader never sees a half-written roles file
+        tmp_file = f"{ROLES_FILE}.tmp"
+        with open(tmp_file, 'w') as f:
             json.dump(user_roles, f)
+        os.replace(tmp_file, ROLES_FILE)
     except Exception as e:
         logger.error(f"Error saving user roles: {str(e)}")
 
+# Roles are read from the file once and served from memory afterwards. The file
+# is only rewritten when a role actually changes.
+_user_roles = load_user_roles()
+_user_roles_lock = threading.Lock()
+
+def get_user_role(user_id):
+    """Get a user's stored role, or None if they haven't picked one"""
+    with _user_roles_lock:
+        return _user_roles.get(user_id)
+
+def store_user_role(user_id, role):
+    """Store a user's role and persist the roles file if it changed"""
+    with _user_roles_lock:
+        if _user_roles.get(user_id) == role:
+            return
+        _user_roles[user_id] = role
+        save_user_roles(_user_roles)
+
 @router.post("/upload-id-photo", response_model=AuthResponse)
 async def upload_id_photo(
     user_id: str = Form(...),
@@ -62,7 +118,7 @@ async def upload_id_photo(
         if not image_data.content_type.startswith('image/'):
             raise ValidationException("Invalid file type. Only images are allowed", "INVALID_FILE_TYPE")
             
-        success = face_auth_service.save_id_photo(user_id, contents)
+        success = await asyncio.to_thread(face_auth_service.save_id_photo, user_id, contents)
         if not success:
             raise ServerException("Failed to save ID photo", "SAVE_FAILED")
             
@@ -94,15 +150,15 @@ async def verify_face(
             raise ValidationException("Invalid file type. Only images are allowed", "INVALID_FILE_TYPE")
             
         # Get stored ID photo
-        id_photo = face_auth_service.get_id_photo(user_id)
+        id_photo = await asyncio.to_thread(face_auth_service.get_id_photo, user_id)
         if not id_photo:
             raise ResourceNotFoundException("ID photo not found", "ID_PHOTO_NOT_FOUND")
             
-        # Compare faces
-        match, match_score = face_auth_service.compare_faces(id_photo, contents)
-        
-        # Check liveness
-        liveness_result = face_auth_service.detect_liveness(contents)
+        # Compare faces and check liveness in parallel, they are independent
+        (match, match_score), liveness_result = await asyncio.gather(
+            asyncio.to_thread(face_auth_service.compare_faces, id_photo, contents),
+            asyncio.to_thread(face_auth_service.detect_liveness, contents)
+        )
         
         if match and liveness_result["is_live"]:
             logger.info(f"Face verification successful for user {user_id}")
@@ -142,7 +198,7 @@ async def check_liveness(
         if not image_data.content_type.startswith('image/'):
             raise ValidationException("Invalid file type. Only images are allowed", "INVALID_FILE_TYPE")
             
-        result = face_auth_service.detect_liveness(contents)
+        result = await asyncio.to_thread(face_auth_service.detect_liveness, contents)
         
         if result["is_live"]:
             logger.info("Liveness check passed")
@@ -177,7 +233,7 @@ async def validate_auth_session(request: Request):
         token = auth_header.split(" ")[1]
         
         # Validate session with Descope
-        validation_response = descope_client.validate_session(token)
+        validation_response = validate_descope_session(token)
         
         # Extract user details from validation response
         user_id = validation_response.get("userId")
@@ -208,7 +264,7 @@ async def get_current_user(request: Request):
         token = auth_header.split(" ")[1]
         
         # Validate session with Descope
-        validation_response = descope_client.validate_session(token)
+        validation_response = validate_descope_session(token)
         
         # Extract user details from validation response
         user_id = validation_response.get("userId")
@@ -238,7 +294,7 @@ async def set_user_role(user_role: UserRoleResponse, request: Request):
         token = auth_header.split(" ")[1]
         
         # Validate session with Descope
-        validation_response = descope_client.validate_session(token)
+        validation_response = validate_descope_session(token)
         
         # Get user ID
         user_id = validation_response.get("userId")
@@ -251,9 +307,7 @@ async def set_user_role(user_role: UserRoleResponse, request: Request):
             raise HTTPException(status_code=400, detail="Invalid role. Must be 'admin' or 'candidate'")
         
         # Store the role in our simple database
-        user_roles = load_user_roles()
-        user_roles[user_id] = role
-        save_user_roles(user_roles)
+        store_user_role(user_id, role)
         
         logger.info(f"Role {role} saved for user {user_id}")
         
@@ -275,7 +329,7 @@ async def check_user_role(request: Request):
         token = auth_header.split(" ")[1]
         
         # Validate session with Descope
-        validation_response = descope_client.validate_session(token)
+        validation_response = validate_descope_session(token)
         
         # Get user ID
         user_id = validation_response.get("userId")
@@ -283,8 +337,7 @@ async def check_user_role(request: Request):
             raise HTTPException(status_code=400, detail="User ID not found in token")
         
         # Get the user's role from our simple database
-        user_roles = load_user_roles()
-        role = user_roles.get(user_id)
+        role = get_user_role(user_id)
         
         if role:
             return {"userId": user_id, "role": role, "hasRole": True}
@@ -2,13 +2,17 @@ from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import os
-import re
+import io
+import asyncio
 import json
+import time
+import hashlib
 import logging
+import threading
 from dotenv import load_dotenv
 import google.generativeai as genai
 import PyPDF2
-from werkzeug.utils import secure_filename
+from itertools import islice
 
 router = APIRouter()
 
@@ -53,44 +57,110 @@ else:
     genai_model = genai.GenerativeModel('gemini-2.5-flash-lite-preview-06-17')
 
 # File upload configuration
-UPLOAD_FOLDER = "uploads"
 ALLOWED_EXTENSIONS = {'pdf'}
 
-# Create upload folder if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Manual text is sent to Gemini in a single prompt, so extraction stops after
+# this many pages or characters instead of reading the whole document
+MAX_PDF_PAGES = 300
+MAX_PDF_TEXT_CHARS = 500_000
+
+# Questions generated from a manual are kept on disk, keyed on a hash of the PDF
+# and the generation parameters, so resubmitting the same manual skips Gemini
+QUESTION_CACHE_DIR = "question_cache"
+QUESTION_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Expired entries are only dropped on read when the same key comes back, so saves
+# also sweep the whole directory for expired files, at most this often
+QUESTION_CACHE_SWEEP_INTERVAL_SECONDS = 60 * 60
+_last_cache_sweep = 0.0
+_cache_sweep_lock = threading.Lock()
+
+os.makedirs(QUESTION_CACHE_DIR, exist_ok=True)
+
+def _question_cache_path(pdf_bytes, *params):
+    digest = hashlib.sha256(pdf_bytes)
+    # The parameters are JSON encoded so they can't run into each other
+    digest.update(json.dumps(params).encode())
+    return os.path.join(QUESTION_CACHE_DIR, f"{digest.hexdigest()}.json")
+
+def load_cached_questions(cache_path):
+    """Return the cached questions at cache_path, or None if missing or expired"""
+    try:
+        if time.time() - os.path.getmtime(cache_path) > QUESTION_CACHE_TTL_SECONDS:
+            os.remove(cache_path)
+            return None
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to read cached questions {cache_path}: {str(e)}")
+        return None
+
+def save_cached_questions(cache_path, questions):
+    try:
+        # Write to a temporary file and swap it in, so readers never see a partial file
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(questions, f)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Failed to cache generated questions {cache_path}: {str(e)}")
+    sweep_question_cache()
+
+def sweep_question_cache():
+    """Delete cache files older than QUESTION_CACHE_TTL_SECONDS, at most once per sweep interval"""
+    global _last_cache_sweep
+    now = time.time()
+    with _cache_sweep_lock:
+        if now - _last_cache_sweep < QUESTION_CACHE_SWEEP_INTERVAL_SECONDS:
+            return
+        _last_cache_sweep = now
+    try:
+        with os.scandir(QUESTION_CACHE_DIR) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and now - entry.stat().st_mtime > QUESTION_CACHE_TTL_SECONDS:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+    except Exception as e:
+        logger.warning(f"Failed to sweep question cache: {str(e)}")
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def handle_file_upload(file: UploadFile):
+async def handle_file_upload(file: UploadFile):
     if not file or file.filename == "":
         raise HTTPException(status_code=400, detail="File not found in request body")
     if not allowed_file(file.filename):
         raise HTTPException(status_code=400, detail="File type not allowed. Only PDF files are supported.")
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    with open(file_path, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
-    return filename
-
-def extract_pdf_text(pdf_path):
-    text = ""
+    # The PDF is only needed for text extraction, so it is read in memory
+    # rather than saved to disk and read back
+    return await file.read()
+
+def extract_pdf_text(pdf_bytes, max_pages=MAX_PDF_PAGES, max_chars=MAX_PDF_TEXT_CHARS):
+    parts = []
+    length = 0
     try:
-        with open(pdf_path, "rb") as file:
-            reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(reader.pages)):
-                text += reader.pages[page_num].extract_text()
-        return text
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        for page in islice(reader.pages, max_pages):
+            page_text = page.extract_text() or ""
+            parts.append(page_text)
+            length += len(page_text)
+            # The prompt can't use more text than this, so skip the remaining pages
+            if length >= max_chars:
+                break
+        return "".join(parts)[:max_chars]
     except Exception as e:
         logger.error(f"Error extracting PDF text: {str(e)}")
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
 def clean_json_string(data):
-    # Clean up the response text
+    # Strip a markdown code fence and any text around the JSON object
     json_str = data.strip()
-    json_str = re.sub(r'```json\s*', '', json_str)
-    json_str = re.sub(r'```\s*$', '', json_str)
+    json_str = json_str.removeprefix("```json").removeprefix("```")
+    json_str = json_str.removesuffix("```")
     start_idx = json_str.find('{')
     end_idx = json_str.rfind('}') + 1
     if start_idx >= 0 and end_idx > start_idx:
@@ -99,13 +169,7 @@ def clean_json_string(data):
 
 def parse_gemini_response(response_text):
     try:
-        json_str = response_text.strip()
-        json_str = re.sub(r'```json\s*', '', json_str)
-        json_str = re.sub(r'```\s*$', '', json_str)
-        start_idx = json_str.find('{')
-        end_idx = json_str.rfind('}') + 1
-        if start_idx >= 0 and end_idx > start_idx:
-            json_str = json_str[start_idx:end_idx]
+        json_str = clean_json_string(response_text)
         data = json.loads(json_str)
         # Handle both dict and list for 'questionData'
         if isinstance(data, dict):
@@ -153,10 +217,19 @@ async def manual_generate_question_api(
         raise HTTPException(status_code=500, detail="AI model not configured. Set GEMINI_API_KEY.")
     try:
         # Handle file upload
-        filename = handle_file_upload(manual)
+        pdf_bytes = await handle_file_upload(manual)
+        
+        # Reuse the questions generated for the same manual and parameters
+        cache_path = _question_cache_path(
+            pdf_bytes, domain, topic, subtopicData, noOfQuestions, difficulty, btLevel
+        )
+        cached = await asyncio.to_thread(load_cached_questions, cache_path)
+        if cached is not None:
+            logger.info(f"Returning cached questions for manual {manual.filename}")
+            return {"questionData": cached}
+        
         # Extract text from the uploaded PDF
-        pdf_path = os.path.join(UPLOAD_FOLDER, filename)
-        pdf_text = extract_pdf_text(pdf_path)
+        pdf_text = await asyncio.to_thread(extract_pdf_text, pdf_bytes)
         # Generate prompt from PDF text
         prompt = f"""You are an expert-level question generator. 
         
@@ -273,20 +346,19 @@ async def manual_generate_question_api(
         - Validate all Q&A pairs before finalizing.      
         
         """
-        response = genai_model.generate_content(prompt)
-        data = parse_gemini_response(response.text)
-        # Clean up the uploaded file
-        try:
-            os.remove(pdf_path)
-        except Exception as e:
-            logger.warning(f"Failed to clean up uploaded file {pdf_path}: {str(e)}")
+        # Await the async client so the event loop keeps serving requests during the call
+        response = await genai_model.generate_content_async(prompt)
+        data = await asyncio.to_thread(parse_gemini_response, response.text)
+        # An empty list means the response couldn't be parsed, so it isn't cached
+        if data:
+            await asyncio.to_thread(save_cached_questions, cache_path, data)
         return {"questionData": data}
     except Exception as e:
         logger.error(f"Error in manual question generation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Manual Question Generation Error: {str(e)}")
 
 @router.post("/api/v1/questions/generate", response_model=QuestionGenerationResponse)
-def generate_question_api(request: QuestionGenerationRequest):
+async def generate_question_api(request: QuestionGenerationRequest):
     if not genai_model:
         raise HTTPException(status_code=500, detail="AI model not configured. Set GEMINI_API_KEY.")
     try:
@@ -409,8 +481,9 @@ def generate_question_api(request: QuestionGenerationRequest):
             """
         
 
-        response = genai_model.generate_content(prompt)
-        data = parse_gemini_response(response.text)
+        # Await the async client so the event loop keeps serving requests during the call
+        response = await genai_model.generate_content_async(prompt)
+        data = await asyncio.to_thread(parse_gemini_response, response.text)
         return {"questionData": data}
     except Exception as e:
         logger.error(f"Error generating questions: {str(e)}")
@@ -7,6 +7,11 @@ import json, re
 
 router = APIRouter()
 
+# Patterns applied to every Gemini response, compiled once at import
+_LEADING_FENCE_RE = re.compile(r"^```(?:json)?", re.IGNORECASE)
+_TRAILING_FENCE_RE = re.compile(r"```$")
+_OPTION_DOUBLE_COLON_RE = re.compile(r'(\{"optionName"\s*:\s*"option\d")\s*:\s*')
+
 class OptionData(BaseModel):
     optionName: str
     optionText: str
@@ -179,15 +184,11 @@ async def generate_questions_with_gemini(library_name: str, domain: str, topic :
     text = response.text.strip()
     # Remove triple backticks and optional 'json' label
     if text.startswith("```"):
-        text = re.sub(r"^```(?:json)?", "", text, flags=re.IGNORECASE).strip()
-        text = re.sub(r"```$", "", text).strip()
+        text = _LEADING_FENCE_RE.sub("", text).strip()
+        text = _TRAILING_FENCE_RE.sub("", text).strip()
     # Fix common LLM JSON mistakes
     # Fix double colon in optionName/optionText
-    text = re.sub(
-        r'(\{"optionName"\s*:\s*"option\d")\s*:\s*',
-        r'\1, "optionText": ',
-        text
-    )
+    text = _OPTION_DOUBLE_COLON_RE.sub(r'\1, "optionText": ', text)
     try:
         data = json.loads(text)
         return data
@@ -54,17 +54,18 @@ async def get_id_photo(user_id: int):
         # Create path to the ID photo directory for the user
         id_photo_dir = os.path.join("media", "id_photos", str(user_id))
         
-        # Check if directory exists
-        if not os.path.exists(id_photo_dir):
-            raise HTTPException(status_code=404, detail="No ID photo found for this user")
-            
-        # Get the first file in the directory (assuming there's only one)
-        files = os.listdir(id_photo_dir)
-        if not files:
+        # Get the first file in the directory (assuming there's only one); the
+        # scan stops at the first entry, and a missing directory counts as empty
+        try:
+            with os.scandir(id_photo_dir) as entries:
+                first_entry = next(entries, None)
+        except FileNotFoundError:
+            first_entry = None
+        if first_entry is None:
             raise HTTPException(status_code=404, detail="No ID photo found for this user")
             
         # Return the file
-        return FileResponse(os.path.join(id_photo_dir, files[0]))
+        return FileResponse(first_entry.path)
     except Exception as e:
         logger.error(f"Error serving ID photo: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -8,6 +8,8 @@ import os
 import pyautogui
 import logging
 import asyncio
+import threading
+from cachetools import LRUCache
 from fastapi.responses import FileResponse
 import base64
 
@@ -19,6 +21,11 @@ logger = logging.getLogger(__name__)
 # Store active capture tasks
 active_captures: Dict[str, asyncio.Task] = {}
 
+# Image listings keyed by (directory, image type), stored with the directory's
+# mtime at scan time; adding, removing or renaming a file changes the mtime
+_image_listing_cache = LRUCache(maxsize=512)
+_image_listing_lock = threading.Lock()
+
 class CaptureRequest(BaseModel):
     testId: str
     userId: str
@@ -34,6 +41,42 @@ class MonitoringEvent(BaseModel):
 class ScreenCaptureRequest(BaseModel):
     test_id: str
 
+def _list_monitoring_images(directory: str, image_type: str) -> List[dict]:
+    """List the images in a monitoring directory with a single scandir pass
+    
+    A missing directory simply yields no images, so callers don't need an
+    os.path.exists check first. Folders that haven't changed since the last
+    scan are served from the listing cache instead of being rescanned.
+    """
+    try:
+        directory_mtime = os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    
+    cache_key = (directory, image_type)
+    with _image_listing_lock:
+        cached = _image_listing_cache.get(cache_key)
+    if cached is not None and cached[0] == directory_mtime:
+        return cached[1]
+    
+    images = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(('.jpg', '.png')) and entry.is_file():
+                    images.append({
+                        "filename": entry.name,
+                        "path": entry.path,
+                        "timestamp": entry.name.split('_')[1].split('.')[0],
+                        "type": image_type
+                    })
+    except FileNotFoundError:
+        return []
+    
+    with _image_listing_lock:
+        _image_listing_cache[cache_key] = (directory_mtime, images)
+    return images
+
 @router.post("/capture")
 async def capture_frame(request: CaptureRequest):
     try:
@@ -70,14 +113,18 @@ async def get_suspicious_images(test_id: Optional[str] = None, user_id: Optional
         suspicious_folder = os.path.join("suspicious_snapshots", test_id) if test_id else "suspicious_snapshots"
         images = []
         
-        if os.path.exists(suspicious_folder):
-            for filename in os.listdir(suspicious_folder):
-                if filename.endswith(('.jpg', '.png')):
-                    images.append({
-                        "filename": filename,
-                        "path": os.path.join(suspicious_folder, filename),
-                        "timestamp": filename.split('_')[1].split('.')[0]  # Extract timestamp from filename
-                    })
+        # A single scandir both lists the folder and tells us whether it exists
+        try:
+            with os.scandir(suspicious_folder) as entries:
+                for entry in entries:
+                    if entry.name.endswith(('.jpg', '.png')):
+                        images.append({
+                            "filename": entry.name,
+                            "path": entry.path,
+                            "timestamp": entry.name.split('_')[1].split('.')[0]  # Extract timestamp from filename
+                        })
+        except FileNotFoundError:
+            pass
         
         return {"images": images}
     except Exception as e:
@@ -232,17 +279,21 @@ async def save_snapshot(
 async def get_suspicious_images(test_id: str):
     try:
         suspicious_folder = os.path.join("suspicious_snapshots", test_id)
-        if not os.path.exists(suspicious_folder):
+        try:
+            entries = os.scandir(suspicious_folder)
+        except FileNotFoundError:
             return []
         
         images = []
-        for filename in os.listdir(suspicious_folder):
-            if filename.startswith("suspicious_") and filename.endswith(".jpg"):
-                images.append({
-                    "filename": filename,
-                    "path": os.path.join(suspicious_folder, filename),
-                    "timestamp": filename.replace("suspicious_", "").replace(".jpg", "")
-                })
+        with entries:
+            for entry in entries:
+                filename = entry.name
+                if filename.startswith("suspicious_") and filename.endswith(".jpg"):
+                    images.append({
+                        "filename": filename,
+                        "path": entry.path,
+                        "timestamp": filename.replace("suspicious_", "").replace(".jpg", "")
+                    })
         
         return images
     except Exception as e:
@@ -263,50 +314,14 @@ async def get_test_monitoring_data(test_id: str):
     Get all monitoring data for a specific test including screenshots, snapshots, and suspicious images
     """
     try:
-        # Get screenshots
-        screenshots_dir = os.path.join("screenshots", test_id)
-        screenshots = []
-        if os.path.exists(screenshots_dir):
-            for filename in os.listdir(screenshots_dir):
-                if filename.endswith(('.jpg', '.png')):
-                    file_path = os.path.join(screenshots_dir, filename)
-                    screenshots.append({
-                        "filename": filename,
-                        "path": file_path,
-                        "timestamp": filename.split('_')[1].split('.')[0],
-                        "type": "screenshot"
-                    })
-
-        # Get regular snapshots
-        snapshots_dir = os.path.join("snapshots", test_id)
-        snapshots = []
-        if os.path.exists(snapshots_dir):
-            for filename in os.listdir(snapshots_dir):
-                if filename.endswith(('.jpg', '.png')):
-                    file_path = os.path.join(snapshots_dir, filename)
-                    snapshots.append({
-                        "filename": filename,
-                        "path": file_path,
-                        "timestamp": filename.split('_')[1].split('.')[0],
-                        "type": "snapshot"
-                    })
-
-        # Get suspicious images
-        suspicious_dir = os.path.join("suspicious_snapshots", test_id)
-        suspicious_images = []
-        if os.path.exists(suspicious_dir):
-            for filename in os.listdir(suspicious_dir):
-                if filename.endswith(('.jpg', '.png')):
-                    file_path = os.path.join(suspicious_dir, filename)
-                    suspicious_images.append({
-                        "filename": filename,
-                        "path": file_path,
-                        "timestamp": filename.split('_')[1].split('.')[0],
-                        "type": "suspicious"
-                    })
-
-        # Get monitoring logs
-        logs = monitoring_service.get_monitoring_logs(test_id)
+        # Scan the screenshot, snapshot and suspicious image folders and read the
+        # monitoring logs concurrently in worker threads, off the event loop
+        screenshots, snapshots, suspicious_images, logs = await asyncio.gather(
+            asyncio.to_thread(_list_monitoring_images, os.path.join("screenshots", test_id), "screenshot"),
+            asyncio.to_thread(_list_monitoring_images, os.path.join("snapshots", test_id), "snapshot"),
+            asyncio.to_thread(_list_monitoring_images, os.path.join("suspicious_snapshots", test_id), "suspicious"),
+            asyncio.to_thread(monitoring_service.get_monitoring_logs, test_id)
+        )
 
         return {
             "screenshots": screenshots,
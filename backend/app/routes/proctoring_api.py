@@ -136,14 +136,10 @@ async def save_webcam_snapshot(
 ):
     """Save a webcam snapshot during a test session"""
     try:
-        # Ensure the directory exists
+        # Ensure the directory exists; makedirs creates the parent as needed
         snapshot_dir = os.path.join("media", "screenshots")
         test_dir = os.path.join(snapshot_dir, f"test_{session_id}")
-        
-        if not os.path.exists(snapshot_dir):
-            os.makedirs(snapshot_dir)
-        if not os.path.exists(test_dir):
-            os.makedirs(test_dir)
+        os.makedirs(test_dir, exist_ok=True)
         
         # Read the uploaded image
         image_data = await image_file.read()
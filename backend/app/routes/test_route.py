@@ -38,6 +38,10 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Markdown code fences Gemini wraps around its JSON, compiled once at import
+_JSON_FENCE_RE = re.compile(r"```json\s*")
+_TRAILING_FENCE_RE = re.compile(r"```\s*$")
+
 router = APIRouter(prefix="/api/tests", tags=["tests"])
 
 # Get API key from environment variable
@@ -356,8 +360,8 @@ def parse_gemini_response(response_text):
         json_str = response_text.strip()
 
         # Remove any markdown code block indicators
-        json_str = re.sub(r"```json\s*", "", json_str)
-        json_str = re.sub(r"```\s*$", "", json_str)
+        json_str = _JSON_FENCE_RE.sub("", json_str)
+        json_str = _TRAILING_FENCE_RE.sub("", json_str)
 
         # Remove any leading/trailing non-JSON text
         start_idx = json_str.find("{")
@@ -4,6 +4,7 @@ from sqlalchemy import func, desc
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import logging
+from collections import Counter
 from ..database import get_db
 from ..models.violation import Violation
 from ..models.test_session import TestSession
@@ -27,15 +28,19 @@ async def get_violations_summary(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Base query
-        query = db.query(Violation).filter(
+        # Base query, selecting only the columns the summary reads
+        query = db.query(
+            Violation.session_id,
+            Violation.violation_type,
+            Violation.timestamp
+        ).filter(
             Violation.timestamp >= start_date,
             Violation.timestamp <= end_date
         )
         
         # Filter by test if specified
         if test_id:
-            query = query.join(TestSession).filter(TestSession.test_id == test_id)
+            query = query.join(TestSession, Violation.session_id == TestSession.id).filter(TestSession.test_id == test_id)
         
         violations = query.all()
         
@@ -43,23 +48,13 @@ async def get_violations_summary(
         total_violations = len(violations)
         
         # Violation counts by type
-        violation_counts = {}
-        for violation in violations:
-            v_type = violation.violation_type
-            violation_counts[v_type] = violation_counts.get(v_type, 0) + 1
+        violation_counts = Counter(violation.violation_type for violation in violations)
         
         # Most problematic sessions
-        session_violation_counts = {}
-        for violation in violations:
-            session_id = violation.session_id
-            session_violation_counts[session_id] = session_violation_counts.get(session_id, 0) + 1
+        session_violation_counts = Counter(violation.session_id for violation in violations)
         
         # Sort by violation count
-        most_problematic_sessions = sorted(
-            session_violation_counts.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:10]  # Top 10
+        most_problematic_sessions = session_violation_counts.most_common(10)  # Top 10
         
         # Get session details for most problematic
         problematic_sessions_details = []
@@ -80,24 +75,21 @@ async def get_violations_summary(
                     "status": session.status
                 })
         
-        # Violations by day (for trending)
-        violations_by_day = {}
-        for i in range(days):
-            date = start_date + timedelta(days=i)
-            date_str = date.strftime('%Y-%m-%d')
-            violations_by_day[date_str] = 0
-        
+        # Violations by day (for trending). Each violation is counted by its day
+        # offset from start_date and the date keys are only formatted once per day.
+        start_day = start_date.date()
+        day_counts = [0] * days
         for violation in violations:
-            date_str = violation.timestamp.strftime('%Y-%m-%d')
-            if date_str in violations_by_day:
-                violations_by_day[date_str] += 1
+            day_index = (violation.timestamp.date() - start_day).days
+            if 0 <= day_index < days:
+                day_counts[day_index] += 1
+        violations_by_day = {
+            (start_day + timedelta(days=i)).isoformat(): count
+            for i, count in enumerate(day_counts)
+        }
         
         # Most common violation types
-        most_common_violations = sorted(
-            violation_counts.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )
+        most_common_violations = violation_counts.most_common()
         
         # Violation descriptions
         violation_descriptions = {
@@ -114,6 +106,20 @@ async def get_violations_summary(
             'audio_suspicious': 'Suspicious audio activity detected'
         }
         
+        # Bucket sessions by risk in one pass over their violation counts
+        severity_analysis = {
+            "high_risk_sessions": 0,
+            "medium_risk_sessions": 0,
+            "low_risk_sessions": 0
+        }
+        for count in session_violation_counts.values():
+            if count >= 10:
+                severity_analysis["high_risk_sessions"] += 1
+            elif count >= 5:
+                severity_analysis["medium_risk_sessions"] += 1
+            elif count >= 1:
+                severity_analysis["low_risk_sessions"] += 1
+        
         return {
             "summary": {
                 "total_violations": total_violations,
@@ -134,11 +140,7 @@ async def get_violations_summary(
                 "by_day": violations_by_day
             },
             "problematic_sessions": problematic_sessions_details,
-            "severity_analysis": {
-                "high_risk_sessions": len([s for s in session_violation_counts.values() if s >= 10]),
-                "medium_risk_sessions": len([s for s in session_violation_counts.values() if 5 <= s < 10]),
-                "low_risk_sessions": len([s for s in session_violation_counts.values() if 1 <= s < 5])
-            }
+            "severity_analysis": severity_analysis
         }
         
     except Exception as e:
@@ -158,7 +160,13 @@ async def get_test_violations_summary(
             raise HTTPException(status_code=404, detail="Test not found")
         
         # Get all sessions for this test
-        sessions = db.query(TestSession).filter(TestSession.test_id == test_id).all()
+        sessions = db.query(
+            TestSession.id,
+            TestSession.user_id,
+            TestSession.start_time,
+            TestSession.end_time,
+            TestSession.status
+        ).filter(TestSession.test_id == test_id).all()
         session_ids = [s.id for s in sessions]
         
         if not session_ids:
@@ -173,22 +181,24 @@ async def get_test_violations_summary(
             }
         
         # Get violations for all sessions
-        violations = db.query(Violation).filter(
+        violations = db.query(
+            Violation.session_id,
+            Violation.violation_type,
+            Violation.timestamp,
+            Violation.details
+        ).filter(
             Violation.session_id.in_(session_ids)
         ).all()
         
         # Process violations by session
         session_violations = {}
-        violation_counts = {}
+        violation_counts = Counter(violation.violation_type for violation in violations)
         
         for violation in violations:
             session_id = violation.session_id
             if session_id not in session_violations:
                 session_violations[session_id] = []
             session_violations[session_id].append(violation)
-            
-            v_type = violation.violation_type
-            violation_counts[v_type] = violation_counts.get(v_type, 0) + 1
         
         # Create session details
         session_details = []
@@ -246,7 +256,14 @@ async def get_user_violations_summary(
         start_date = end_date - timedelta(days=days)
         
         # Get user's sessions in date range
-        sessions = db.query(TestSession).filter(
+        sessions = db.query(
+            TestSession.id,
+            TestSession.test_id,
+            TestSession.start_time,
+            TestSession.end_time,
+            TestSession.status,
+            TestSession.score
+        ).filter(
             TestSession.user_id == user_id,
             TestSession.start_time >= start_date,
             TestSession.start_time <= end_date
@@ -265,13 +282,16 @@ async def get_user_violations_summary(
         
         session_ids = [s.id for s in sessions]
         
-        # Get violations for user's sessions
-        violations = db.query(Violation).filter(
+        # Get violations for user's sessions, only their session and type are counted
+        violations = db.query(
+            Violation.session_id,
+            Violation.violation_type
+        ).filter(
             Violation.session_id.in_(session_ids)
         ).all()
         
         # Process violations
-        violation_counts = {}
+        violation_counts = Counter(violation.violation_type for violation in violations)
         session_violations = {}
         
         for violation in violations:
@@ -279,9 +299,6 @@ async def get_user_violations_summary(
             if session_id not in session_violations:
                 session_violations[session_id] = []
             session_violations[session_id].append(violation)
-            
-            v_type = violation.violation_type
-            violation_counts[v_type] = violation_counts.get(v_type, 0) + 1
         
         # Create session summaries
         session_summaries = []
@@ -5,7 +5,7 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional, Tuple
 from fastapi import UploadFile
-import shutil
+import aiofiles
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -13,6 +13,10 @@ logger = logging.getLogger(__name__)
 # Base directory for media storage
 MEDIA_ROOT = Path("media")
 
+# Bytes copied per read when saving an upload to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
 class FileService:
     """Service for handling file uploads and retrievals"""
     
@@ -77,12 +81,11 @@ class FileService:
             # Full path where the file will be stored
             file_path = media_dir / filename
             
-            # Read the file content
-            content = await upload_file.read()
-            
-            # Write the content to the file
-            with open(file_path, "wb") as f:
-                f.write(content)
+            # Copy the upload to the file in chunks without blocking the event
+            # loop, so the whole upload is never held in memory
+            async with aiofiles.open(file_path, "wb") as f:
+                while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
             
             # Get the directory name from the media_dir path to ensure consistency
             dir_name = media_dir.relative_to(MEDIA_ROOT).parts[0]
@@ -143,8 +146,8 @@ class FileService:
             file_path = media_dir / filename
             
             # Write the content to the file
-            with open(file_path, "wb") as f:
-                f.write(data)
+            async with aiofiles.open(file_path, "wb") as f:
+                await f.write(data)
             
             # Get the directory name from the media_dir path to ensure consistency
             dir_name = media_dir.relative_to(MEDIA_ROOT).parts[0]
@@ -3,8 +3,10 @@ import cv2
 import numpy as np
 import face_recognition
 from datetime import datetime
+from cachetools import LRUCache
 import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,9 @@ class MonitoringService:
     def __init__(self):
         self.logs_dir = "monitoring_logs"
         os.makedirs(self.logs_dir, exist_ok=True)
+        # Parsed log files keyed by path, stored with the (mtime, size) they were read at
+        self._logs_cache = LRUCache(maxsize=256)
+        self._logs_cache_lock = threading.Lock()
 
     def process_image(self, image_data, test_id, user_id):
         try:
@@ -90,10 +95,23 @@ class MonitoringService:
         try:
             log_file = os.path.join(self.logs_dir, f"{test_id}_events.json")
             
-            if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    return json.load(f)
-            return []
+            try:
+                stat = os.stat(log_file)
+            except FileNotFoundError:
+                return []
+            
+            # Skip re-reading and re-parsing the file if it hasn't changed since last time
+            file_version = (stat.st_mtime_ns, stat.st_size)
+            with self._logs_cache_lock:
+                cached = self._logs_cache.get(log_file)
+            if cached is not None and cached[0] == file_version:
+                return cached[1]
+            
+            with open(log_file, 'r') as f:
+                logs = json.load(f)
+            with self._logs_cache_lock:
+                self._logs_cache[log_file] = (file_version, logs)
+            return logs
             
         except Exception as e:
             logger.error(f"Error getting monitoring logs: {str(e)}")
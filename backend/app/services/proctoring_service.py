@@ -1,4 +1,6 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from ..models.test_session import TestSession
 from ..models.violation import Violation
 from ..models.screen_capture import ScreenCapture
 from ..models.behavioral_anomaly import BehavioralAnomaly
@@ -176,6 +178,27 @@ class ProctoringService:
             logger.error(f"Error in get_session_violations: {str(e)}")
             raise
     
+    @staticmethod
+    def get_violation_type_counts_for_user(db: Session, user_id: int):
+        """Count a user's violations across all of their sessions, by violation type"""
+        if db is None:
+            logger.error("Database session is None in get_violation_type_counts_for_user")
+            raise ValueError("Database session is not available")
+            
+        try:
+            rows = db.query(
+                Violation.violation_type,
+                func.count(Violation.id)
+            ).join(
+                TestSession, Violation.session_id == TestSession.id
+            ).filter(
+                TestSession.user_id == user_id
+            ).group_by(Violation.violation_type).all()
+            return {violation_type: count for violation_type, count in rows}
+        except Exception as e:
+            logger.error(f"Error in get_violation_type_counts_for_user: {str(e)}")
+            raise
+    
     @staticmethod
     def get_session_screen_captures(db: Session, session_id: int):
         if db is None:
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from ..models.test_session import TestSession
+from ..models.session_daily_rollup import SessionDailyRollup
 from ..models.test import Test
 from ..models.question import Question
 from ..models.option import Option
@@ -11,6 +13,7 @@ from datetime import datetime, timedelta
 import pytz
 from typing import List, Dict, Any
 import logging
+import math
 import time
 from ..services.screenshot import screenshot_service
 from ..utils.file_cleanup import cleanup_session_files, cleanup_all_session_files
@@ -21,7 +24,75 @@ logger = logging.getLogger(__name__)
 # Define IST timezone
 IST = pytz.timezone('Asia/Kolkata')
 
+# SessionDailyRollup score distribution columns, one per 20-point band. Each band
+# includes its upper bound, so 20 is counted in bucket_0_20 and 20.5 in bucket_21_40.
+SCORE_BUCKETS = ("bucket_0_20", "bucket_21_40", "bucket_41_60", "bucket_61_80", "bucket_81_100")
+
+
+def _score_bucket(percentage):
+    """Name of the rollup distribution column a score is counted in"""
+    # Index the band arithmetically instead of comparing against each bound in turn
+    return SCORE_BUCKETS[min(max(math.ceil(percentage / 20) - 1, 0), len(SCORE_BUCKETS) - 1)]
+
+
 class TestSessionService:
+    @staticmethod
+    def _apply_to_daily_rollup(db: Session, session: TestSession, sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) a completed session's totals in its daily rollup row
+
+        Runs in the caller's transaction, so the rollup is committed together with
+        the session change. The rollup is written inside a savepoint: if it fails,
+        only the rollup change is rolled back and logged, never the submission or
+        deletion it belongs to.
+        """
+        if session.status != "completed" or session.end_time is None:
+            return
+        
+        try:
+            with db.begin_nested():
+                TestSessionService._write_daily_rollup(db, session, sign)
+        except Exception as e:
+            logger.error(f"Failed to update daily rollup for session {session.id}: {str(e)}")
+    
+    @staticmethod
+    def _write_daily_rollup(db: Session, session: TestSession, sign: int):
+        day = session.end_time.date()
+        score = session.percentage or 0
+        key = (
+            SessionDailyRollup.test_id == session.test_id,
+            SessionDailyRollup.user_id == session.user_id,
+            SessionDailyRollup.day == day
+        )
+        deltas = {
+            "completed_count": sign,
+            "sum_pct": sign * score,
+            "sum_pct_sq": sign * score * score
+        }
+        if session.percentage is not None:
+            deltas[_score_bucket(session.percentage)] = sign
+        
+        def increment():
+            return db.query(SessionDailyRollup).filter(*key).update(
+                {getattr(SessionDailyRollup, column): getattr(SessionDailyRollup, column) + delta
+                 for column, delta in deltas.items()},
+                synchronize_session=False
+            )
+        
+        updated = increment()
+        if not updated and sign > 0:
+            # First session of the day for this test and user, the other buckets default to 0
+            try:
+                with db.begin_nested():
+                    db.add(SessionDailyRollup(test_id=session.test_id, user_id=session.user_id, day=day, **deltas))
+            except IntegrityError:
+                # A concurrent submit inserted the row first; add to it instead
+                increment()
+        elif sign < 0:
+            # Drop rows that no longer count any session
+            db.query(SessionDailyRollup).filter(
+                *key, SessionDailyRollup.completed_count <= 0
+            ).delete(synchronize_session=False)
+    
     @staticmethod
     def create_session(db: Session, session: TestSessionCreate):
         if db is None:
@@ -255,6 +326,9 @@ class TestSessionService:
 
             logger.info(f"Final score calculation: correct_answers={correct_answers}, total_questions={total_questions}, percentage={percentage}")
 
+            # Take a resubmitted session's previous result out of the rollup
+            TestSessionService._apply_to_daily_rollup(db, session, sign=-1)
+
             # Update session with results
             # Convert end_time to IST
             end_time = submit_data.end_time
@@ -278,6 +352,7 @@ class TestSessionService:
             session.total_questions = total_questions
             session.percentage = percentage
             session.status = "completed"
+            TestSessionService._apply_to_daily_rollup(db, session)
 
             # Save changes
             db.commit()
@@ -354,6 +429,7 @@ class TestSessionService:
             cleanup_session_files(session_id)
             
             # Delete the session (cascade will handle related data)
+            TestSessionService._apply_to_daily_rollup(db, session, sign=-1)
             db.delete(session)
             db.commit()
             
@@ -389,6 +465,7 @@ class TestSessionService:
                     
                     # Delete the session (cascade will handle related data)
                     db.delete(session)
+                    TestSessionService._apply_to_daily_rollup(db, session, sign=-1)
                     deleted_count += 1
                     
                 except Exception as e:
@@ -424,6 +501,7 @@ class TestSessionService:
                     
                     # Delete the session (cascade will handle related data)
                     db.delete(session)
+                    TestSessionService._apply_to_daily_rollup(db, session, sign=-1)
                     deleted_count += 1
                     
                 except Exception as e:
@@ -1,15 +1,26 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, literal, select
 from ..models.violation import Violation
 from ..models.test_session import TestSession
 from ..schemas.violation import ViolationCreate
+from cachetools import TTLCache
+from collections import Counter
 from datetime import datetime
 import logging
 import os
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List
 import pytz
 
 logger = logging.getLogger(__name__)
 
+# Sessions known to exist. Violations arrive continuously for the same session
+# during a test, so a positive lookup is reused for a minute instead of querying
+# test_sessions on every log call. Misses are never cached, so a session created
+# moments later is picked up immediately.
+_existing_sessions = TTLCache(maxsize=10_000, ttl=60)
+_existing_sessions_lock = threading.Lock()
+
 class ViolationService:
     # Define violation types with their descriptions
     VIOLATION_TYPES = {
@@ -26,6 +37,19 @@ class ViolationService:
         'audio_suspicious': 'Suspicious audio activity detected'
     }
     
+    @staticmethod
+    def session_exists(db: Session, session_id: int) -> bool:
+        """Check whether a test session exists, reusing recent positive lookups"""
+        with _existing_sessions_lock:
+            if session_id in _existing_sessions:
+                return True
+        
+        exists = db.query(TestSession.id).filter(TestSession.id == session_id).scalar() is not None
+        if exists:
+            with _existing_sessions_lock:
+                _existing_sessions[session_id] = True
+        return exists
+    
     @staticmethod
     def log_violation(
         db: Session,
@@ -70,8 +94,7 @@ class ViolationService:
                 # Allow unknown types but log warning
             
             # Check if session exists
-            session_exists = db.query(TestSession).filter(TestSession.id == session_id).first()
-            if not session_exists:
+            if not ViolationService.session_exists(db, session_id):
                 logger.warning(f"Session {session_id} not found. Violation will not be saved.")
                 return None
             
@@ -248,6 +271,42 @@ class ViolationService:
             db, session_id, 'audio_suspicious', details, filepath
         )
 
+    @staticmethod
+    def list_session_violations(
+        db: Session,
+        session_id: int,
+        violation_type: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """List one type of violation for a session as plain dicts, newest first
+        
+        Ties on timestamp are broken by id, so limit/offset pages never overlap.
+        
+        Only the response columns are selected, as Core rows rather than ORM objects.
+        violation_type is inlined as a literal so SQL Server can match filtered indexes
+        such as ix_violation_window_blur_session_ts; it must be one of VIOLATION_TYPES,
+        never request input.
+        """
+        stmt = select(
+            Violation.id,
+            Violation.session_id,
+            Violation.timestamp,
+            Violation.details,
+            Violation.filepath
+        ).where(
+            and_(
+                Violation.session_id == session_id,
+                Violation.violation_type == literal(violation_type, literal_execute=True)
+            )
+        ).order_by(Violation.timestamp.desc(), Violation.id.desc())
+        if offset:
+            stmt = stmt.offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        
+        return [dict(row) for row in db.execute(stmt.execution_options(yield_per=500)).mappings()]
+    
     @staticmethod
     def get_session_violations_summary(db: Session, session_id: int) -> Dict[str, Any]:
         """Get a summary of violations for a session"""
@@ -257,10 +316,7 @@ class ViolationService:
             ).order_by(Violation.timestamp).all()
             
             # Count violations by type
-            violation_counts = {}
-            for violation in violations:
-                v_type = violation.violation_type
-                violation_counts[v_type] = violation_counts.get(v_type, 0) + 1
+            violation_counts = dict(Counter(v.violation_type for v in violations))
             
             return {
                 "total_violations": len(violations),
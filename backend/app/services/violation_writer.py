@@ -0,0 +1,184 @@
+"""
+Violation Writer
+
+Buffers high-frequency violations (tab switches, window blurs) in an asyncio
+queue and writes them to the database in batches from a background task, so the
+request that reports a violation does not wait on an INSERT and COMMIT.
+"""
+
+from sqlalchemy import insert
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import pytz
+
+from app.database import SessionLocal
+from app.models.violation import Violation
+from app.services.violation_service import ViolationService
+
+logger = logging.getLogger(__name__)
+
+# Rows waiting to be written; when full, callers fall back to a direct insert
+VIOLATION_QUEUE_MAXSIZE = 10_000
+# Upper bound on rows per INSERT ... VALUES batch
+VIOLATION_BATCH_SIZE = 100
+# How long the writer keeps collecting rows after the first one arrives
+VIOLATION_BATCH_WAIT_SECONDS = 0.05
+
+IST = pytz.timezone('Asia/Kolkata')
+
+_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+
+# Callbacks run with the session_id of each committed row, per violation type, so
+# features can drop cached reads once the row is actually in the database
+_commit_listeners: Dict[str, List[Callable[[int], None]]] = {}
+
+
+def add_commit_listener(violation_type: str, listener: Callable[[int], None]) -> None:
+    """Call listener(session_id) after queued violations of this type are committed"""
+    _commit_listeners.setdefault(violation_type, []).append(listener)
+
+
+def _notify_committed(rows: List[Dict[str, Any]]) -> None:
+    """Run the commit listeners once per committed (violation_type, session_id)"""
+    for violation_type, session_id in {(row["violation_type"], row["session_id"]) for row in rows}:
+        for listener in _commit_listeners.get(violation_type, ()):
+            try:
+                listener(session_id)
+            except Exception as e:
+                logger.error("Violation commit listener failed for session %s: %s", session_id, e)
+
+
+def enqueue_violation(
+    session_id: int,
+    violation_type: str,
+    details: Optional[Dict[str, Any]] = None,
+    filepath: Optional[str] = None
+) -> bool:
+    """Queue a violation for the background writer
+
+    Returns False when the writer is not running or the queue is full, in which
+    case the caller should log the violation synchronously instead.
+    """
+    if _queue is None or _writer_task is None or _writer_task.done():
+        return False
+
+    try:
+        _queue.put_nowait({
+            "session_id": session_id,
+            "violation_type": violation_type,
+            "details": details or {},
+            "filepath": filepath,
+            "timestamp": datetime.now(IST)
+        })
+        return True
+    except asyncio.QueueFull:
+        logger.warning("Violation queue full, writing %s for session %s directly", violation_type, session_id)
+        return False
+
+
+def _write_rows_individually(db, rows: List[Dict[str, Any]]) -> None:
+    """Write rows one at a time so a bad row only loses itself"""
+    written = []
+    for row in rows:
+        violation = ViolationService.log_violation(
+            db,
+            row["session_id"],
+            row["violation_type"],
+            row["details"],
+            row["filepath"],
+            row["timestamp"]
+        )
+        if violation is None:
+            logger.error("Dropped queued %s violation for session %s", row["violation_type"], row["session_id"])
+        else:
+            written.append(row)
+    _notify_committed(written)
+
+
+def _write_batch(rows: List[Dict[str, Any]]) -> None:
+    """Insert a batch of queued violations in a single transaction
+
+    The requests that reported these rows have already been answered, so no row
+    is dropped without a log line. If the batch INSERT fails, the rows are
+    retried one by one instead of losing the whole batch.
+    """
+    db = SessionLocal()
+    try:
+        valid_rows = []
+        for row in rows:
+            if ViolationService.session_exists(db, row["session_id"]):
+                valid_rows.append(row)
+            else:
+                logger.warning("Dropped queued %s violation: session %s not found", row["violation_type"], row["session_id"])
+        if not valid_rows:
+            return
+        
+        try:
+            db.execute(insert(Violation), valid_rows)
+            db.commit()
+            _notify_committed(valid_rows)
+        except Exception as e:
+            logger.error("Error writing violation batch of %s rows, retrying row by row: %s", len(valid_rows), e)
+            db.rollback()
+            _write_rows_individually(db, valid_rows)
+    except Exception as e:
+        logger.error("Error writing violation batch of %s rows: %s", len(rows), e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def _run_writer() -> None:
+    """Drain the queue, writing up to VIOLATION_BATCH_SIZE rows per round trip"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = []
+        try:
+            batch.append(await _queue.get())
+            deadline = loop.time() + VIOLATION_BATCH_WAIT_SECONDS
+            while len(batch) < VIOLATION_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Don't drop rows already taken off the queue when shutting down
+            if batch:
+                await asyncio.to_thread(_write_batch, batch)
+            raise
+
+        await asyncio.to_thread(_write_batch, batch)
+
+
+async def start_violation_writer() -> None:
+    """Create the queue and start the background writer on the running loop"""
+    global _queue, _writer_task
+    if _writer_task is not None and not _writer_task.done():
+        return
+    _queue = asyncio.Queue(maxsize=VIOLATION_QUEUE_MAXSIZE)
+    _writer_task = asyncio.create_task(_run_writer())
+
+
+async def stop_violation_writer() -> None:
+    """Stop the writer and flush whatever is still queued"""
+    global _writer_task
+    if _writer_task is None:
+        return
+    _writer_task.cancel()
+    try:
+        await _writer_task
+    except asyncio.CancelledError:
+        pass
+    _writer_task = None
+
+    pending = []
+    while not _queue.empty():
+        pending.append(_queue.get_nowait())
+    for start in range(0, len(pending), VIOLATION_BATCH_SIZE):
+        await asyncio.to_thread(_write_batch, pending[start:start + VIOLATION_BATCH_SIZE])
\ No newline at end of file
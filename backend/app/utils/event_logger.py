@@ -11,6 +11,10 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ProctoringEventLogger:
+    # One instance is kept per session for the life of the process, so drop the
+    # per-instance __dict__
+    __slots__ = ("session_id", "events", "logs_dir", "session_file")
+
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.events: List[Dict[str, Any]] = []
@@ -1,8 +1,8 @@
-import json
 import logging
 from datetime import datetime
-import os
+import threading
 from pathlib import Path
+import orjson
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -12,6 +12,15 @@ logger = logging.getLogger(__name__)
 logs_dir = Path("monitoring_logs")
 logs_dir.mkdir(parents=True, exist_ok=True)
 
+# Events are appended one JSON object per line. Each log file is opened once per
+# process and kept open in append mode, so a call writes only its own line instead
+# of rewriting the file or keeping past events in memory; writes go through the lock.
+_event_log_files = {}
+_event_log_files_lock = threading.Lock()
+
+# Event payloads come from many callers and may use non-string keys
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+
 def log_event(event_type, event_data):
     """
     Log an event to a file
@@ -27,31 +36,21 @@ def log_event(event_type, event_data):
             "event_type": event_type,
             "data": event_data
         }
+        line = orjson.dumps(event, option=_ORJSON_OPTIONS)
         
         # Append to log file
-        log_file = logs_dir / f"{event_type}_log.json"
-        
-        # Initialize file with an empty array if it doesn't exist
-        if not log_file.exists():
-            with open(log_file, 'w') as f:
-                json.dump([], f)
-        
-        # Read existing logs
-        with open(log_file, 'r') as f:
-            try:
-                logs = json.load(f)
-            except json.JSONDecodeError:
-                logs = []
-        
-        # Append new event
-        logs.append(event)
+        log_file = logs_dir / f"{event_type}_log.jsonl"
         
-        # Write back to file
-        with open(log_file, 'w') as f:
-            json.dump(logs, f, indent=2)
+        with _event_log_files_lock:
+            f = _event_log_files.get(log_file)
+            if f is None:
+                f = open(log_file, 'ab')
+                _event_log_files[log_file] = f
+            f.write(line)
+            f.flush()
         
         logger.info(f"Logged {event_type} event")
         return True
     except Exception as e:
         logger.error(f"Error logging event: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
@@ -7,6 +7,15 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Event type -> (metric it increments, whether it counts as a violation)
+_EVENT_METRICS = {
+    "tab_switch": ("tab_switches", True),
+    "multiple_faces": ("multiple_faces", True),
+    "gaze_away": ("gaze_away", True),
+    "left_frame": ("gaze_away", True),
+    "poor_lighting": ("poor_lighting", False)
+}
+
 def generate_proctoring_report(events: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Generate a comprehensive proctoring report from events.
@@ -17,7 +26,7 @@ def generate_proctoring_report(events: List[Dict[str, Any]]) -> Dict[str, Any]:
     Returns:
         Dictionary containing report data
     """
-    logger.info(f"Generating report for {len(events)} events")
+    logger.info("Generating report for %s events", len(events))
     
     # Initialize metrics
     metrics = {
@@ -28,40 +37,25 @@ def generate_proctoring_report(events: List[Dict[str, Any]]) -> Dict[str, Any]:
         "total_violations": 0
     }
     
-    # Track timestamps for timeline
-    timeline = []
+    # Build the timeline in one pass
+    timeline = [
+        {
+            "timestamp": event.get("timestamp", ""),
+            "event_type": event.get("event_type", ""),
+            "details": event.get("details", {})
+        }
+        for event in events
+    ]
     
-    # Process events
-    for event in events:
-        event_type = event.get("event_type", "")
-        timestamp = event.get("timestamp", "")
-        details = event.get("details", {})
-        
-        logger.info(f"Processing event: {event_type} at {timestamp}")
-        
-        # Update metrics based on event type
-        if event_type == "tab_switch":
-            metrics["tab_switches"] += 1
+    # Update metrics based on event type
+    for entry in timeline:
+        metric = _EVENT_METRICS.get(entry["event_type"])
+        if metric is None:
+            continue
+        metric_name, is_violation = metric
+        metrics[metric_name] += 1
+        if is_violation:
             metrics["total_violations"] += 1
-            logger.info(f"Tab switch detected. Total: {metrics['tab_switches']}")
-        elif event_type == "multiple_faces":
-            metrics["multiple_faces"] += 1
-            metrics["total_violations"] += 1
-            logger.info(f"Multiple faces detected. Total: {metrics['multiple_faces']}")
-        elif event_type in ["gaze_away", "left_frame"]:
-            metrics["gaze_away"] += 1
-            metrics["total_violations"] += 1
-            logger.info(f"Gaze away detected. Total: {metrics['gaze_away']}")
-        elif event_type == "poor_lighting":
-            metrics["poor_lighting"] += 1
-            logger.info(f"Poor lighting detected. Total: {metrics['poor_lighting']}")
-        
-        # Add to timeline
-        timeline.append({
-            "timestamp": timestamp,
-            "event_type": event_type,
-            "details": details
-        })
     
     # Calculate environment rating
     environment_rating = calculate_environment_rating(metrics)
@@ -78,7 +72,7 @@ def generate_proctoring_report(events: List[Dict[str, Any]]) -> Dict[str, Any]:
     else:
         duration = 0
     
-    logger.info(f"Final metrics: {metrics}")
+    logger.info("Final metrics: %s", metrics)
     
     return {
         "metrics": metrics,
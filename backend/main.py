@@ -1,10 +1,11 @@
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from starlette.responses import PlainTextResponse
 from pathlib import Path
+from contextlib import asynccontextmanager
 from app.routes import exam_route, test_route, auth_routes, proctoring_events, monitoring, user_routes
 from app.routes import test_api, proctoring_api, analytics, face_verification_api, media_routes, violation_analytics
 from app.routes.session_api import router as session_api_router  # Import the database-based session API
@@ -24,6 +25,7 @@ import datetime
 from app.routes import batch_api
 from app.routes import manual_test
 from app.routes import library_routes
+from app.services.violation_writer import start_violation_writer, stop_violation_writer
 
 # Initialize database
 from app.database import engine, Base, recreate_all_tables, create_default_admin
@@ -86,7 +88,19 @@ except Exception as e:
 #     logger.error(f"Failed to grant permissions: {str(e)}")
 #     logger.warning("Continuing anyway, but there might be permission issues.")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the batched writer used for high-frequency violations while the app
+    serves requests, and flush queued violations before the process exits"""
+    await start_violation_writer()
+    try:
+        yield
+    finally:
+        await stop_violation_writer()
+
+# Serialize responses with orjson; it encodes datetimes natively and is much
+# faster than the stdlib encoder on the violation list endpoints
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Define allowed origins
 origins = [
@@ -182,7 +196,7 @@ async def health_check():
         return {
             "status": "ok",
             "message": "API is running",
-            "timestamp": str(datetime.datetime.now()),
+            "timestamp": datetime.datetime.now(),
             "version": "1.0.0"
         }
     except Exception as e:
@@ -0,0 +1,118 @@
+"""
+Test fixtures
+
+Each test runs against a fresh in-memory SQLite database seeded with one user,
+test and session. QueryCounter records the SQL statements a block of code
+issues, so tests can put an upper bound on queries per endpoint and catch N+1
+lazy loads introduced by later changes.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, get_db
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.models import Test, TestSession, User, Violation
+
+
+class QueryCounter:
+    """Counts the SQL statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @contextmanager
+    def __call__(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        try:
+            yield self
+        finally:
+            event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    # Same session options as app.database.SessionLocal
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+    db = SessionLocal()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def session_id(db):
+    user = User(name="Candidate", email="candidate@example.com", role="candidate")
+    db.add(user)
+    db.flush()
+    db.add(Test(test_id=1, skill="python", num_questions=10, duration=30, created_by=user.id))
+    session = TestSession(test_id=1, user_id=user.id, status="in_progress")
+    db.add(session)
+    db.commit()
+    return session.id
+
+
+@pytest.fixture
+def seed_violations(db, session_id):
+    def seed(violation_type, count, details=None):
+        start = datetime(2026, 1, 1, 9, 0, 0)
+        db.add_all([
+            Violation(
+                session_id=session_id,
+                violation_type=violation_type,
+                details=details or {},
+                timestamp=start + timedelta(seconds=i)
+            ) for i in range(count)
+        ])
+        db.commit()
+        # Start requests from an empty identity map, as a fresh request session would
+        db.expunge_all()
+    return seed
+
+
+@pytest.fixture
+def query_counter(engine):
+    return QueryCounter(engine)
+
+
+@pytest.fixture
+def make_client(db):
+    def make(*routers):
+        app = FastAPI(default_response_class=ORJSONResponse)
+        for router in routers:
+            app.include_router(router)
+        app.dependency_overrides[get_db] = lambda: db
+        return TestClient(app)
+    return make
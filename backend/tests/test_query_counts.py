@@ -0,0 +1,71 @@
+"""
+Query-count guards for the lighting and microphone permission endpoints
+
+Each endpoint is called with SEEDED_VIOLATIONS rows in place and must not issue
+more SQL statements than it needs today. Touching a relationship on the
+returned violations (e.g. violation.session.user) adds lazy SELECTs and pushes
+the count past the bound.
+"""
+
+import pytest
+
+from app.features.lighting_analysis.routes import router as lighting_router
+from app.features.microphone_permission.routes import router as microphone_router
+
+SEEDED_VIOLATIONS = 20
+
+LIGHTING_DETAILS = {"brightness_level": 0.1, "lighting_condition": "too_dark", "additional_info": {}}
+MICROPHONE_DETAILS = {"error_type": "permission_denied"}
+
+
+@pytest.mark.parametrize("path, max_queries", [
+    ("/api/proctoring/lighting-analysis/session/{session_id}/violations", 1),
+    # Latest violation and total count
+    ("/api/proctoring/lighting-analysis/session/{session_id}/status", 2),
+    ("/api/proctoring/lighting-analysis/session/{session_id}/summary", 1),
+])
+def test_lighting_endpoints_query_count(make_client, seed_violations, session_id, query_counter, path, max_queries):
+    seed_violations("lighting_issue", SEEDED_VIOLATIONS, LIGHTING_DETAILS)
+    client = make_client(lighting_router)
+
+    with query_counter() as queries:
+        response = client.get(path.format(session_id=session_id))
+
+    assert response.status_code == 200
+    assert "error" not in response.json()
+    assert queries.count <= max_queries, queries.statements
+
+
+def test_lighting_violations_pages_query_count(make_client, seed_violations, session_id, query_counter):
+    seed_violations("lighting_issue", SEEDED_VIOLATIONS, LIGHTING_DETAILS)
+    client = make_client(lighting_router)
+    path = f"/api/proctoring/lighting-analysis/session/{session_id}/violations"
+
+    ids = []
+    params = {"limit": 7}
+    while True:
+        with query_counter() as queries:
+            page = client.get(path, params=params).json()
+        assert queries.count <= 1, queries.statements
+        ids.extend(item["id"] for item in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params = {"limit": 7, "cursor": page["next_cursor"]["timestamp"], "cursor_id": page["next_cursor"]["id"]}
+
+    assert len(ids) == len(set(ids)) == SEEDED_VIOLATIONS
+
+
+@pytest.mark.parametrize("brief", [False, True])
+def test_microphone_violation_check_query_count(make_client, seed_violations, session_id, query_counter, brief):
+    seed_violations("microphone_permission_denied", SEEDED_VIOLATIONS, MICROPHONE_DETAILS)
+    client = make_client(microphone_router)
+
+    with query_counter() as queries:
+        response = client.get(
+            f"/api/proctoring/microphone-permission/session/{session_id}/violation-check",
+            params={"brief": brief}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["has_violation"] is True
+    assert queries.count <= 1, queries.statements
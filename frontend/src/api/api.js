@@ -942,7 +942,7 @@ export const keyboardShortcutsAPI = {
 // Lighting Analysis API
 export const lightingAnalysisAPI = {
     logViolation: (data) => api.post('/api/proctoring/lighting-analysis/violation', data),
-    getSessionViolations: (sessionId) => api.get(`/api/proctoring/lighting-analysis/session/${sessionId}/violations`),
+    getSessionViolations: (sessionId, params = {}) => api.get(`/api/proctoring/lighting-analysis/session/${sessionId}/violations`, { params }),
     getStatus: (sessionId) => api.get(`/api/proctoring/lighting-analysis/session/${sessionId}/status`),
     getSummary: (sessionId) => api.get(`/api/proctoring/lighting-analysis/session/${sessionId}/summary`),
     analyzeLighting: (brightnessLevel, previousBrightness) => api.post('/api/proctoring/lighting-analysis/analyze', {
@@ -979,6 +979,7 @@ export const audioMonitoringAPI = {
 // Permission Logging API
 export const permissionLoggingAPI = {
     logPermission: (data) => api.post('/api/proctoring/permission-logging/log', data),
+    logPermissionsBulk: (events) => api.post('/api/proctoring/permission-logging/log/bulk', events),
     getSessionPermissions: (sessionId) => api.get(`/api/proctoring/permission-logging/session/${sessionId}/permissions`),
     getStatus: (sessionId) => api.get(`/api/proctoring/permission-logging/session/${sessionId}/status`),
     getSummary: (sessionId) => api.get(`/api/proctoring/permission-logging/session/${sessionId}/summary`),
@@ -55,11 +55,18 @@ export const useLightingAnalysis = (sessionId) => {
         }
     }, [sessionId]);
 
-    // Get session violations
-    const getViolations = useCallback(async () => {
+    // Get session violations (paginated; pass the returned next_cursor to append older ones)
+    const getViolations = useCallback(async (cursor = null) => {
         try {
-            const response = await api.get(`/api/proctoring/lighting-analysis/session/${sessionId}/violations`);
-            setViolations(response.data);
+            const response = await api.get(`/api/proctoring/lighting-analysis/session/${sessionId}/violations`, {
+                params: cursor ? { cursor: cursor.timestamp, cursor_id: cursor.id } : {}
+            });
+            const items = response.data.items;
+            if (cursor) {
+                setViolations(prev => [...prev, ...items]);
+            } else {
+                setViolations(items);
+            }
             return response.data;
         } catch (error) {
             console.error('Error getting lighting violations:', error);